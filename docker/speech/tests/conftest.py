@@ -0,0 +1,29 @@
+"""Test setup: import wake_word_detector as a module, without audio hardware"""
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import sounddevice  # noqa: F401
+except (ImportError, OSError):
+    # PortAudio is only needed to open the microphone, which no test does
+    sounddevice = types.ModuleType('sounddevice')
+    sounddevice.PortAudioError = OSError
+    sounddevice.InputStream = None
+    sys.modules['sounddevice'] = sounddevice
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: wall-clock timing check, run with SPEECH_BENCHMARKS=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get('SPEECH_BENCHMARKS') == '1':
+        return
+    import pytest
+    skip = pytest.mark.skip(reason="timing benchmark, set SPEECH_BENCHMARKS=1 to run")
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
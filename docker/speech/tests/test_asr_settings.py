@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import wake_word_detector as detector
+
+
+@pytest.fixture
+def calibration_file(monkeypatch, tmp_path):
+    path = tmp_path / "asr_calibration.json"
+    monkeypatch.setattr(detector, "ASR_CALIBRATION_FILE", str(path))
+    monkeypatch.setattr(detector, "available_cpus", lambda: 8)
+    monkeypatch.setattr(detector, "ASR_CPU_THREADS", "auto")
+    monkeypatch.setattr(detector, "ASR_NUM_WORKERS", "auto")
+    monkeypatch.setattr(detector, "ASR_COMPUTE_TYPE", "auto")
+
+    def save(**fields):
+        calibration = dict(model="base", cpus=8, compute_type="int8_float32", cpu_threads=7, rtf=0.1)
+        calibration.update(fields)
+        path.write_text(json.dumps(calibration))
+
+    return save
+
+
+def test_calibration_applies_to_its_worker_count(monkeypatch, calibration_file):
+    monkeypatch.setattr(detector, "ASR_WORKERS", 2)
+    calibration_file(num_workers=2, cpu_threads=3)
+    settings = detector.asr_runtime_settings("base")
+    assert (settings["cpu_threads"], settings["num_workers"]) == (3, 2)
+    assert settings["compute_type"] == "int8_float32"
+
+
+def test_calibration_for_another_worker_count_is_ignored(monkeypatch, calibration_file):
+    monkeypatch.setattr(detector, "ASR_WORKERS", 2)
+    calibration_file(num_workers=1)
+    settings = detector.asr_runtime_settings("base")
+    # Seven threads per worker would oversubscribe eight cpus twice over
+    assert (settings["cpu_threads"], settings["num_workers"]) == (3, 2)
+    assert settings["compute_type"] == "int8"
+
+
+def test_calibration_without_worker_count_means_one_worker(monkeypatch, calibration_file):
+    monkeypatch.setattr(detector, "ASR_WORKERS", 1)
+    calibration_file()
+    assert detector.asr_runtime_settings("base")["cpu_threads"] == 7
+    monkeypatch.setattr(detector, "ASR_NUM_WORKERS", "4")
+    assert detector.asr_runtime_settings("base")["cpu_threads"] == 1
+
+
+def test_asr_process_loads_one_worker_with_the_full_budget(monkeypatch, calibration_file):
+    monkeypatch.setattr(detector, "ASR_WORKERS", 2)
+    settings = detector.asr_runtime_settings("base", num_workers=1)
+    assert (settings["cpu_threads"], settings["num_workers"]) == (7, 1)
+
+    loads = []
+    sent = []
+
+    def initialize(model_name=None, num_workers=None):
+        loads.append(num_workers)
+        raise RuntimeError("no model in tests")
+
+    class Pipe:
+        send = sent.append
+
+    monkeypatch.setattr(detector, "initialize_asr_model", initialize)
+    shm = detector.shared_memory.SharedMemory(create=True, size=64)
+    try:
+        detector._asr_process_main(Pipe(), shm.name, 16, None, "base")
+    finally:
+        shm.close()
+        shm.unlink()
+    assert loads == [1]
+    assert sent[0][0] == "error"
@@ -0,0 +1,129 @@
+import random
+import time
+
+import pytest
+
+import wake_word_detector as detector
+from wake_word_detector import FuzzyResolver, bounded_edit_distance
+
+ROOMS = ["wohnzimmer", "schlafzimmer", "kinderzimmer", "arbeitszimmer", "küche", "badezimmer", "flur", "keller"]
+DEVICES = ["lampe", "deckenlicht", "stehlampe", "leselampe", "lichterkette", "ventilator", "steckdose"]
+LETTERS = "abcdefghijklmnopqrstuvwxyzäöü"
+
+
+def edit_distance(a, b):
+    """Plain Levenshtein distance, the reference for the banded one"""
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def vocabulary(size, seed=0):
+    """size distinct near-duplicate names like 'wohnzimmer stehlampe links'"""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        suffix = "".join(rng.choice(LETTERS) for _ in range(rng.randint(0, 4)))
+        names.add(" ".join(filter(None, [rng.choice(ROOMS), rng.choice(DEVICES), suffix])))
+    return sorted(names)
+
+
+def misspell(rng, name, edits):
+    for _ in range(edits):
+        i = rng.randrange(len(name) + 1)
+        operation = rng.choice("ids")
+        if operation == "i":
+            name = name[:i] + rng.choice(LETTERS) + name[i:]
+        elif i < len(name):
+            name = name[:i] + (rng.choice(LETTERS) if operation == "s" else "") + name[i + 1:]
+    return name
+
+
+def test_bounded_edit_distance_matches_levenshtein():
+    rng = random.Random(1)
+    names = [name.replace(" ", "") for name in vocabulary(200)]
+    for _ in range(2000):
+        a = rng.choice(names)
+        b = misspell(rng, rng.choice([a, rng.choice(names)]), rng.randint(0, 3))
+        limit = rng.randint(0, 3)
+        assert bounded_edit_distance(a, b, limit) == min(edit_distance(a, b), limit + 1), (a, b, limit)
+
+
+def test_lookup_finds_the_closest_name_like_a_full_scan():
+    rng = random.Random(2)
+    names = vocabulary(300)
+    resolver = FuzzyResolver({name: [("entity", name)] for name in names})
+    joined = [name.replace(" ", "") for name in names]
+    for _ in range(300):
+        query = misspell(rng, rng.choice(joined), rng.randint(0, 3))
+        limit = FuzzyResolver.max_distance(query)
+        # A name whose length differs by more than the limit is out of range anyway
+        closest = min((edit_distance(query, name) for name in joined if abs(len(name) - len(query)) <= limit),
+                      default=limit + 1)
+        match = resolver.lookup(query)
+        if len(query) < 4 or closest > limit:
+            assert match is None, query
+        else:
+            assert match is not None, query
+            assert match[2] == closest == edit_distance(query, match[0]), query
+
+
+def test_lookup_looks_past_near_duplicates():
+    # Two letters appended keep all but one query trigram, a substitution loses two:
+    # all sixteen decoys rank above the name a single edit away
+    target = "wohnzimmerlampelinks"
+    decoys = [f"wohnzimmerlampelinkx{a}{b}" for a in "abcd" for b in "efgh"]
+    resolver = FuzzyResolver({name: [("entity", name)] for name in decoys + [target]})
+    assert resolver.lookup("wohnzimmerlampelinkx") == (target, [("entity", target)], 1)
+
+
+SENTENCES = [
+    ("schalte bitte das licht im wohnzimer stehlampe jetzt sofort", ("wohnzimmerstehlampe", 1)),
+    ("mach mal die schlaf zimmer lampe", ("schlafzimmerlampe", 0)),
+    ("kannst du bitte die küche deckenlicht ausmachen danke", ("küchedeckenlicht", 0)),
+    ("mach bitte mal die musik etwas lauter jetzt", None),
+]
+
+
+@pytest.fixture(scope="module")
+def large_resolver():
+    return FuzzyResolver({name: [("entity", name)] for name in vocabulary(3000) + ["wohnzimmer stehlampe"]})
+
+
+@pytest.fixture
+def verifications(monkeypatch):
+    calls = []
+
+    def counted(a, b, limit):
+        calls.append((a, b))
+        return bounded_edit_distance(a, b, limit)
+
+    monkeypatch.setattr(detector, "bounded_edit_distance", counted)
+    return calls
+
+
+@pytest.mark.parametrize("sentence, expected", SENTENCES)
+def test_resolve_on_a_full_transcript_verifies_few_names(large_resolver, verifications, sentence, expected):
+    # Every word window is searched exactly first, then at one edit, so a
+    # near miss is verified against a handful of names, not every window's pool
+    match = large_resolver.resolve(sentence.split())
+    assert (match and (match[0], match[2])) == expected
+    assert len(verifications) <= 3
+
+
+@pytest.mark.benchmark
+def test_resolve_benchmark(large_resolver):
+    for sentence, _ in SENTENCES:
+        words = sentence.split()
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            large_resolver.resolve(words)
+            timings.append(time.perf_counter() - start)
+        median = sorted(timings)[len(timings) // 2]
+        print(f"{median * 1e6:7.0f} us  {sentence}")
+        assert median < 2e-3
@@ -0,0 +1,71 @@
+import pytest
+import requests
+
+import wake_word_detector as detector
+
+
+def response(status):
+    response = requests.Response()
+    response.status_code = status
+    response.url = f"{detector.HASS_HOST}/api/services/light/toggle"
+    return response
+
+
+class ScriptedSession:
+    """Stands in for the pooled session: each request takes the next outcome, raising exceptions"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.attempts = 0
+
+    def request(self, method, url, **kwargs):
+        self.attempts += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def session(monkeypatch):
+    monkeypatch.setattr(detector, "HASS_MAX_RETRIES", 2)
+    monkeypatch.setattr(detector.time, "sleep", lambda seconds: None)
+
+    def install(*outcomes):
+        scripted = ScriptedSession(*outcomes)
+        monkeypatch.setattr(detector, "get_hass_session", lambda: scripted)
+        return scripted
+
+    return install
+
+
+def toggle():
+    return detector._hass_request("POST", "/api/services/light/toggle", json={"entity_id": "light.lamp"})
+
+
+def test_connect_timeout_is_retried(session):
+    scripted = session(requests.exceptions.ConnectTimeout("connect timed out"), response(200))
+    assert toggle().status_code == 200
+    assert scripted.attempts == 2
+
+
+def test_read_timeout_is_not_retried(session):
+    # The toggle may already have run, so a second attempt could undo it
+    scripted = session(requests.exceptions.ReadTimeout("read timed out"), response(200))
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        toggle()
+    assert scripted.attempts == 1
+
+
+def test_unavailable_is_retried_up_to_the_limit(session):
+    scripted = session(response(503), response(503), response(503), response(200))
+    with pytest.raises(requests.exceptions.HTTPError):
+        toggle()
+    assert scripted.attempts == detector.HASS_MAX_RETRIES + 1
+
+
+def test_server_error_is_not_retried(session):
+    scripted = session(response(500), response(200))
+    with pytest.raises(requests.exceptions.HTTPError):
+        toggle()
+    assert scripted.attempts == 1
@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("websockets")
+from websockets.sync.server import serve
+
+import wake_word_detector as detector
+from wake_word_detector import HassRegistry, HassWebSocket
+
+TOKEN = "test-token"
+
+
+class StandInHass:
+    """Minimal Home Assistant WebSocket API: auth, ping, subscriptions, empty registries and call_service.
+
+    Results echo the call's service_data. With batch set, results are held
+    until that many calls arrived and then sent in reverse order, so replies
+    only reach the right caller if they are routed by id. With drop_calls set,
+    the connection is closed as soon as a call_service arrives.
+    subscribe_delay holds back subscription acknowledgements, and the first
+    withhold_acks subscriptions are never acknowledged.
+    """
+
+    REGISTRY_RESULTS = {
+        "config/area_registry/list": [],
+        "config/device_registry/list": [],
+        "config/entity_registry/list": [],
+        "get_states": [],
+    }
+
+    def __init__(self, batch=1, drop_calls=False, subscribe_delay=0, withhold_acks=0):
+        self.batch = batch
+        self.drop_calls = drop_calls
+        self.subscribe_delay = subscribe_delay
+        self.withhold_acks = withhold_acks
+        self.calls = []
+        self.subscriptions = []
+        self.reloads = 0
+        self.server = serve(self.handle, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self.server.socket.getsockname()[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, socket):
+        socket.send(json.dumps({"type": "auth_required"}))
+        if json.loads(socket.recv()).get("access_token") != TOKEN:
+            socket.send(json.dumps({"type": "auth_invalid", "message": "Invalid access token"}))
+            return
+        socket.send(json.dumps({"type": "auth_ok"}))
+        held = []
+        last_id = 0
+        for raw in socket:
+            message = json.loads(raw)
+            assert message["id"] > last_id, "message ids must increase"
+            last_id = message["id"]
+            if message["type"] == "ping":
+                socket.send(json.dumps({"id": message["id"], "type": "pong"}))
+                continue
+            if message["type"] == "subscribe_events":
+                self.subscriptions.append(message["event_type"])
+                if len(self.subscriptions) <= self.withhold_acks:
+                    continue
+                ack = json.dumps({"id": message["id"], "type": "result", "success": True, "result": None})
+                threading.Timer(self.subscribe_delay, socket.send, [ack]).start()
+                continue
+            if message["type"] in self.REGISTRY_RESULTS:
+                self.reloads += message["type"] == "get_states"
+                socket.send(json.dumps({
+                    "id": message["id"], "type": "result", "success": True,
+                    "result": self.REGISTRY_RESULTS[message["type"]],
+                }))
+                continue
+            self.calls.append(message)
+            if self.drop_calls:
+                return
+            held.append(message)
+            if len(held) >= self.batch:
+                for call in reversed(held):
+                    socket.send(json.dumps({
+                        "id": call["id"], "type": "result", "success": True, "result": call["service_data"],
+                    }))
+                held = []
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def make_server():
+    servers = []
+
+    def make(**kwargs):
+        servers.append(StandInHass(**kwargs))
+        return servers[-1]
+
+    yield make
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def make_client():
+    clients = []
+
+    def make(url, token=TOKEN, call_timeout=2):
+        clients.append(HassWebSocket(url, token, ping_interval=0.5, call_timeout=call_timeout).start())
+        return clients[-1]
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_authenticates_with_token(make_server, make_client):
+    server = make_server()
+    assert make_client(server.url).wait_connected(2)
+    assert not make_client(server.url, token="wrong").wait_connected(0.5)
+
+
+def test_pipelined_calls_are_routed_by_id(make_server, make_client):
+    server = make_server(batch=8)
+    client = make_client(server.url)
+    assert client.wait_connected(2)
+
+    def call(i):
+        return client.call_service("light", "turn_on", {"entity_id": f"light.lamp_{i}"})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(call, range(8)))
+
+    assert results == [{"entity_id": f"light.lamp_{i}"} for i in range(8)]
+    assert len(server.calls) == 8
+
+
+def test_dropped_socket_fails_the_call_in_flight(make_server, make_client):
+    server = make_server(drop_calls=True)
+    client = make_client(server.url)
+    assert client.wait_connected(2)
+    # Not a ConnectionError: the call reached Home Assistant and may have run
+    with pytest.raises(RuntimeError, match="before the call was acknowledged"):
+        client.call_service("light", "toggle", {"entity_id": "light.lamp"})
+
+
+@pytest.fixture
+def rest_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(detector, "HASS_TOKEN", TOKEN)
+    monkeypatch.setattr(detector, "_hass_request", lambda method, path, **kwargs: calls.append((path, kwargs)))
+    return calls
+
+
+def test_falls_back_to_rest_when_the_call_was_never_sent(monkeypatch, rest_calls):
+    class Unsent:
+        connected = True
+
+        def call_service(self, *args, **kwargs):
+            raise ConnectionError("Home Assistant WebSocket send failed")
+
+    monkeypatch.setattr(detector, "get_hass_websocket", lambda: Unsent())
+    assert detector.send_command_to_hass("light", "turn_on", {"entity_id": "light.lamp"})
+    assert rest_calls == [("/api/services/light/turn_on", {"json": {"entity_id": "light.lamp"}})]
+
+
+def test_no_rest_retry_after_a_call_in_flight_is_lost(monkeypatch, make_server, make_client, rest_calls):
+    client = make_client(make_server(drop_calls=True).url)
+    assert client.wait_connected(2)
+    monkeypatch.setattr(detector, "get_hass_websocket", lambda: client)
+    assert not detector.send_command_to_hass("light", "toggle", {"entity_id": "light.lamp"})
+    assert rest_calls == []
+
+
+def test_registry_start_does_not_wait_for_slow_subscriptions(make_server, make_client):
+    client = make_client(make_server(subscribe_delay=3).url)
+    assert client.wait_connected(2)
+    start = time.perf_counter()
+    registry = HassRegistry(client).start()
+    assert time.perf_counter() - start < 0.5
+    assert not registry.loaded.is_set()
+
+
+def test_warm_up_survives_slow_subscriptions(monkeypatch, make_server, make_client, rest_calls):
+    client = make_client(make_server(subscribe_delay=3).url)
+    monkeypatch.setattr(detector, "get_hass_websocket", lambda: client)
+    monkeypatch.setattr(detector, "_hass_registry", None)
+    monkeypatch.setattr(detector, "HASS_READ_TIMEOUT", 0.5)
+    detector.warm_up_hass_connection()
+    assert detector._hass_registry is not None
+
+
+def test_each_event_type_is_subscribed_once(make_server, make_client):
+    server = make_server()
+    client = make_client(server.url)
+    assert client.wait_connected(2)
+    registry = HassRegistry(client).start()
+    assert registry.loaded.wait(2)
+    assert sorted(server.subscriptions) == sorted(set(server.subscriptions))
+    assert set(server.subscriptions) == {
+        "state_changed", "entity_registry_updated", "device_registry_updated", "area_registry_updated",
+    }
+
+
+def test_unacknowledged_subscription_is_retried(make_server, make_client):
+    server = make_server(withhold_acks=1)
+    client = make_client(server.url, call_timeout=0.5)
+    assert client.wait_connected(2)
+    registry = HassRegistry(client).start()
+    assert registry.loaded.wait(2)
+    deadline = time.monotonic() + 5
+    while server.reloads < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    # The lost subscription is made again on the same connection, then the cache reloads
+    assert server.subscriptions.count(server.subscriptions[0]) == 2
+    assert set(server.subscriptions) == {
+        "state_changed", "entity_registry_updated", "device_registry_updated", "area_registry_updated",
+    }
+    assert server.reloads == 2
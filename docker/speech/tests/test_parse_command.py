@@ -0,0 +1,54 @@
+import pytest
+
+import wake_word_detector as detector
+from wake_word_detector import PhraseMatcher
+
+
+@pytest.fixture(autouse=True)
+def no_registry(monkeypatch):
+    monkeypatch.setattr(detector, "get_hass_registry", lambda: None)
+
+
+@pytest.mark.parametrize("text, call", [
+    ("Licht im Wohnzimmer an", ("light", "turn_on", {"entity_id": "light.living_room"})),
+    ("Wohnzimmerlicht an", ("light", "turn_on", {"entity_id": "light.living_room"})),
+    ("küchenlicht aus", ("light", "turn_off", {"entity_id": "light.kitchen"})),
+    ("das licht im badezimmer an", ("light", "turn_on", {"entity_id": "light.bathroom"})),
+    ("Schlafzimmerlampe ausschalten", ("light", "turn_off", {"entity_id": "light.bedroom"})),
+    ("Wohnzimmerdeckenlampe an", ("light", "turn_on", {"entity_id": "light.living_room"})),
+])
+def test_parses_rooms_in_compound_words(text, call):
+    assert detector.parse_command(text) == call
+
+
+@pytest.mark.parametrize("text", ["Badminton an", "baden an", "Küchentisch aus"])
+def test_words_that_merely_start_with_a_room_are_not_rooms(text):
+    assert detector.parse_command(text) is None
+
+
+def test_area_name_is_not_matched_inside_other_words():
+    matcher = PhraseMatcher({
+        "an": [("command", "turn_on")],
+        "eg": [("area", "ground_floor")],
+    }, compound_kinds=("room", "area"))
+    assert matcher.find("ist mir egal mach an") == [("an", [("command", "turn_on")])]
+    assert matcher.find("eg deckenlampe an")[0] == ("eg", [("area", "ground_floor")])
+    assert matcher.find("egdeckenlampe an")[0] == ("eg", [("area", "ground_floor")])
+
+
+def test_commands_match_whole_words_only():
+    # "an" inside "wohnzimmer" or "anna" is not a command
+    assert detector.parse_command("Wohnzimmer von Anna") is None
+
+
+def test_compound_match_keeps_only_room_and_area_meanings():
+    matcher = PhraseMatcher({
+        "an": [("command", "turn_on")],
+        "garten": [("area", "garden"), ("entity", "light.garten")],
+    }, compound_kinds=("room", "area"))
+    assert matcher.find("gartenlicht an") == [
+        ("garten", [("area", "garden")]),
+        ("an", [("command", "turn_on")]),
+    ]
+    assert matcher.find("garten an")[0] == ("garten", [("area", "garden"), ("entity", "light.garten")])
+    assert matcher.find("ansage") == []
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from wake_word_detector import AudioRingBuffer, SharedRingReader
+
+CAPACITY = 4096
+CHUNK = 1024
+
+
+@pytest.fixture
+def ring(tmp_path):
+    ring = AudioRingBuffer(CAPACITY, sample_rate=16000, backing=str(tmp_path / "ring"))
+    for value in range(CAPACITY // CHUNK):
+        ring.write(np.full(CHUNK, float(value), dtype=np.float32))
+    yield ring
+    ring.close()
+
+
+@pytest.fixture
+def reader(ring):
+    reader = SharedRingReader(ring.backing)
+    yield reader
+    reader.close()
+
+
+def interleave_writes(reader, ring, writes):
+    """Make the next `writes` copies taken by reader.read land a writer chunk mid-copy"""
+    view = reader.view
+    remaining = [writes]
+
+    class InterleavedView:
+        def __init__(self, samples):
+            self.samples = samples
+
+        def copy(self):
+            if remaining[0] > 0:
+                remaining[0] -= 1
+                ring.write(np.full(CHUNK, 99.0, dtype=np.float32))
+            return self.samples.copy()
+
+    reader.view = lambda start, end: InterleavedView(view(start, end))
+
+
+def test_read_matches_written_samples(ring, reader):
+    oldest = ring.total_written - CAPACITY
+    audio = reader.read(oldest + CHUNK, oldest + 3 * CHUNK)
+    np.testing.assert_array_equal(audio, np.repeat([1.0, 2.0], CHUNK))
+    np.testing.assert_array_equal(audio, ring.read(oldest + CHUNK, oldest + 3 * CHUNK))
+
+
+def test_read_rejects_samples_overwritten_during_copy(ring, reader):
+    oldest = ring.total_written - CAPACITY
+    interleave_writes(reader, ring, writes=1)
+    # The retry finds the window gone instead of returning the new samples
+    with pytest.raises(ValueError):
+        reader.read(oldest, oldest + CHUNK)
+
+
+def test_read_gives_up_when_every_copy_overlaps_a_write(ring, reader):
+    newest = ring.total_written - CHUNK
+    interleave_writes(reader, ring, writes=3)
+    with pytest.raises(RuntimeError):
+        reader.read(newest, newest + CHUNK, retries=3)
+
+
+def test_read_retries_after_an_interleaved_write(ring, reader):
+    oldest = ring.total_written - CAPACITY
+    interleave_writes(reader, ring, writes=1)
+    audio = reader.read(oldest + 2 * CHUNK, oldest + 3 * CHUNK)
+    np.testing.assert_array_equal(audio, np.full(CHUNK, 2.0, dtype=np.float32))
+
+
+def test_overwritten_window_is_not_buffered(ring, reader):
+    oldest = ring.total_written - CAPACITY
+    ring.write(np.full(CHUNK, 99.0, dtype=np.float32))
+    assert not reader.is_valid(oldest)
+    with pytest.raises(ValueError):
+        reader.read(oldest, oldest + CHUNK)
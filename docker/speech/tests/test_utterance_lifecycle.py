@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+import pytest
+
+import wake_word_detector as detector
+
+FRAME = detector.CHUNK_SIZE
+COMMAND = "Licht im Wohnzimmer an"
+
+
+class FakeModel:
+    def transcribe(self, audio, **options):
+        return [detector.ASRSegment(0.0, 1.0, COMMAND, -0.1, 0.01, 1.0)], None
+
+
+@pytest.fixture
+def executed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(detector, "execute_command", lambda call: calls.append(call) or True)
+    return calls
+
+
+@pytest.fixture
+def processor(monkeypatch, executed):
+    monkeypatch.setattr(detector.sd, "InputStream", lambda **kwargs: None, raising=False)
+    monkeypatch.setattr(detector, "WAKE_WORD_ENABLED", False)
+    monkeypatch.setattr(detector, "STREAMING_ASR", True)
+    monkeypatch.setattr(detector, "SAVE_AUDIO_SEGMENTS", False)
+    monkeypatch.setattr(detector, "get_asr_model", lambda tier='main': FakeModel())
+    monkeypatch.setattr(detector, "transcribe_audio", lambda audio, options: (COMMAND, [], None))
+    processor = detector.AudioProcessor()
+    yield processor
+    processor.ring.close()
+
+
+def feed(processor, pattern):
+    """Feed (seconds, is_speech) runs frame by frame, running queued ASR jobs as they arrive"""
+    for seconds, speech in pattern:
+        for _ in range(int(seconds * detector.SAMPLE_RATE / FRAME)):
+            offset = processor.ring.total_written
+            processor.ring.write(np.zeros(FRAME, dtype=np.float32))
+            processor._update_continuous(speech, offset, FRAME)
+            drain(processor)
+
+
+def drain(processor):
+    while (item := processor.asr_queue.get(timeout=0)) is not None:
+        job, _ = item
+        try:
+            processor.process_audio(job.audio, job.continuation, job.final, job.utterance, job.partial)
+        finally:
+            processor.asr_queue.task_done(job)
+
+
+def assert_no_utterance_state(processor):
+    assert processor.stitchers == {}
+    assert processor.agreements == {}
+    assert processor.executed_utterances == set()
+
+
+def test_short_burst_is_not_executed_from_partials(processor, executed):
+    feed(processor, [(1.0, True), (1.5, False)])
+    assert executed == []
+    assert_no_utterance_state(processor)
+
+
+def test_command_runs_once_from_partials(processor, executed):
+    feed(processor, [(2.5, True), (1.5, False)])
+    assert len(executed) == 1
+    assert_no_utterance_state(processor)
+
+
+def test_discarded_utterance_releases_its_chunks(processor, executed):
+    # Sparse speech: the span passes the chunk interval, the speech total never reaches MIN_SPEECH_DURATION
+    feed(processor, [(0.5, True), (0.8, False)] * 3 + [(2.0, False)])
+    assert_no_utterance_state(processor)
+
+
+def job(utterance, final=True, partial=False):
+    return detector.TranscriptionJob(np.zeros(FRAME, dtype=np.float32), False, final, utterance, partial)
+
+
+def test_executor_reports_shed_and_expired_jobs():
+    dropped = []
+    executor = detector.ASRExecutor(maxsize=1, deadline=60, on_drop=dropped.append)
+    assert executor.put(job(1), detector.PRIORITY_CONTINUOUS)
+    assert not executor.put(job(2, partial=True), detector.PRIORITY_PARTIAL)
+    assert not executor.put(job(3), detector.PRIORITY_WAKE)
+    assert [j.utterance for j in dropped] == [2, 1]
+
+    executor.deadline = 0
+    time.sleep(0.01)
+    assert executor.get(timeout=0) is None
+    assert [j.utterance for j in dropped] == [2, 1, 3]
+
+
+def test_dropped_final_job_closes_the_utterance(processor, executed):
+    processor.stitchers[7] = detector.TranscriptStitcher()
+    processor.agreements[7] = detector.LocalAgreement()
+    processor.executed_utterances.add(7)
+    processor._on_job_dropped(job(7))
+    assert_no_utterance_state(processor)
+    # A chunk of the utterance still in flight does not bring its state back
+    processor.process_audio(job(7, final=False).audio, True, False, 7)
+    assert_no_utterance_state(processor)
+
+
+def test_dropped_chunk_is_not_stitched_across(processor, executed, monkeypatch):
+    texts = iter(["Licht im Wohnzimmer", "aus"])
+    monkeypatch.setattr(detector, "transcribe_audio", lambda audio, options: (next(texts), [], None))
+    processor.process_audio(job(7).audio, False, False, 7)
+    processor._on_job_dropped(job(7, final=False))
+    processor.process_audio(job(7).audio, True, True, 7)
+    assert executed == []
+    assert_no_utterance_state(processor)
+
+
+@pytest.mark.parametrize("cascade, tier", [(False, "main"), (True, "fast")])
+def test_partials_use_the_fast_tier_with_the_cascade(processor, monkeypatch, cascade, tier):
+    tiers = []
+    monkeypatch.setattr(detector, "ASR_CASCADE", cascade)
+    monkeypatch.setattr(detector, "get_asr_model", lambda tier='main': tiers.append(tier) or FakeModel())
+    processor.process_partial(np.zeros(FRAME, dtype=np.float32), 7)
+    assert tiers == [tier]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import wake_word_detector as detector
+from wake_word_detector import frame_signal, is_speech, is_speech_batch
+
+FRAME = detector.CHUNK_SIZE
+RATE = detector.SAMPLE_RATE
+
+
+def recording(seconds=4.0, seed=0):
+    """Silence, noise, a voiced sweep, a feedback tone, clicks and a pulse train, one after another"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * RATE) // 6
+    t = np.arange(n) / RATE
+    pitch = 120 + 60 * t / t[-1]
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    voiced = 0.2 * sum(np.sin(k * phase) / k for k in range(1, 8)) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    clicks = 0.01 * rng.standard_normal(n)
+    clicks[::700] = 0.9
+    pulses = np.zeros(n)
+    pulses[::160] = 0.5
+    parts = [
+        np.zeros(n),
+        0.05 * rng.standard_normal(n),
+        voiced + 0.005 * rng.standard_normal(n),
+        0.3 * np.sin(2 * np.pi * 3000 * t),
+        clicks,
+        pulses,
+    ]
+    return np.concatenate(parts).astype(np.float32)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_batch_features_match_streaming_frame_by_frame(block_size):
+    frames = frame_signal(recording())
+    decisions, features = is_speech_batch(frames, block_size=block_size)
+    for i, frame in enumerate(frames):
+        streaming = detector._feature_engine.analyze(frame)
+        for name in detector.FrameFeatures._fields:
+            assert getattr(features, name)[i] == getattr(streaming, name), (i, name)
+        assert decisions[i] == is_speech(frame), i
+    assert 0 < np.count_nonzero(decisions) < len(frames)
+
+
+def test_streaming_features_are_python_scalars():
+    features = detector._feature_engine.analyze(recording()[:FRAME])
+    assert [type(value) for value in features] == [float, float, bool, bool, bool]
@@ -0,0 +1,40 @@
+import sys
+import types
+
+import pytest
+
+import wake_word_detector as detector
+from wake_word_detector import parse_wake_word_models, wake_word_inference_framework
+
+
+def test_parses_names_paths_and_thresholds():
+    assert parse_wake_word_models("hey_jarvis, /models/hey_gaja.onnx:0.7", default_threshold=0.5) == [
+        ("hey_jarvis", "hey_jarvis", 0.5),
+        ("/models/hey_gaja.onnx", "hey_gaja", 0.7),
+    ]
+
+
+@pytest.mark.parametrize("spec, framework", [
+    ("hey_jarvis", None),
+    ("hey_jarvis,/models/hey_gaja.onnx", "onnx"),
+    ("/models/hey_gaja.tflite:0.6,/models/gaja.TFLITE", "tflite"),
+])
+def test_framework_follows_model_files(spec, framework):
+    assert wake_word_inference_framework(parse_wake_word_models(spec)) == framework
+
+
+@pytest.mark.parametrize("spec", ["/models/a.onnx,/models/b.tflite", "/models/hey_gaja.pb"])
+def test_rejects_mixed_or_unknown_model_files(spec):
+    with pytest.raises(ValueError):
+        wake_word_inference_framework(parse_wake_word_models(spec))
+
+
+def test_model_is_loaded_with_the_file_framework(monkeypatch):
+    loaded = []
+    openwakeword = types.ModuleType("openwakeword")
+    openwakeword.Model = lambda **kwargs: loaded.append(kwargs)
+    monkeypatch.setitem(sys.modules, "openwakeword", openwakeword)
+    monkeypatch.setattr(detector, "WAKE_WORD_MODELS", parse_wake_word_models("/models/hey_gaja.onnx"))
+    detector.initialize_wake_word_model()
+    assert loaded[0]["inference_framework"] == "onnx"
+    assert loaded[0]["wakeword_models"] == ["/models/hey_gaja.onnx"]
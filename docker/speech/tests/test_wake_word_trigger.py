@@ -0,0 +1,52 @@
+import pytest
+
+import wake_word_detector as detector
+from wake_word_detector import WakeWordTrigger
+
+FRAME = detector.CHUNK_SIZE
+RATE = detector.SAMPLE_RATE
+REFRACTORY = 1.0
+REFRACTORY_FRAMES = int(REFRACTORY * RATE / FRAME) + 1
+
+
+def triggers(mode, scores):
+    """Frame indices at which a trigger fires for a sequence of hey_jarvis scores"""
+    trigger = WakeWordTrigger({"hey_jarvis": 0.5}, frames=3, mode=mode, refractory=REFRACTORY, sample_rate=RATE)
+    return [i for i, score in enumerate(scores) if trigger.update({"hey_jarvis": score}, i * FRAME)]
+
+
+def burst(frames, score=0.9):
+    return [score] * frames
+
+
+def quiet(frames):
+    return [0.0] * frames
+
+
+@pytest.mark.parametrize("mode", ["mean", "peak"])
+def test_one_trigger_per_burst(mode):
+    assert len(triggers(mode, quiet(5) + burst(10) + quiet(5))) == 1
+
+
+@pytest.mark.parametrize("mode", ["mean", "peak"])
+def test_burst_longer_than_the_refractory_window_triggers_once(mode):
+    assert len(triggers(mode, quiet(5) + burst(3 * REFRACTORY_FRAMES) + quiet(5))) == 1
+
+
+@pytest.mark.parametrize("mode", ["mean", "peak"])
+def test_no_retrigger_within_the_refractory_window(mode):
+    # The score drops below threshold in between, but the second burst comes too soon
+    assert len(triggers(mode, burst(4) + quiet(5) + burst(4) + quiet(5))) == 1
+
+
+@pytest.mark.parametrize("mode", ["mean", "peak"])
+def test_retrigger_after_refractory_window_and_a_drop(mode):
+    fired = triggers(mode, burst(4) + quiet(REFRACTORY_FRAMES + 5) + burst(4))
+    assert len(fired) == 2
+    assert (fired[1] - fired[0]) * FRAME >= REFRACTORY * RATE
+
+
+def test_smoothing_modes_differ_on_a_single_frame_spike():
+    spike = quiet(5) + burst(1) + quiet(5)
+    assert triggers("mean", spike) == []
+    assert triggers("peak", spike) == [5]
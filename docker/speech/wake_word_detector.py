@@ -1,16 +1,23 @@
 import os
+import sys
 import json
 import queue
 import threading
+from collections import deque, namedtuple
 import numpy as np
 import sounddevice as sd
-from openwakeword import Model
 from datetime import datetime
 import wave
-from faster_whisper import WhisperModel
 import requests
 import logging
+import random
 import time
+import heapq
+import itertools
+import mmap
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(
@@ -25,7 +32,15 @@ CHANNELS = 1
 CHUNK_SIZE = 1024
 BUFFER_DURATION = 10  # seconds to keep in buffer
 DETECTION_THRESHOLD = 0.5
-CONTINUOUS_TRANSCRIPTION_INTERVAL = 3  # seconds between transcriptions
+CONTINUOUS_TRANSCRIPTION_INTERVAL = 3  # seconds of new audio between partial transcriptions of long utterances
+CONTINUOUS_OVERLAP_DURATION = 1.0  # seconds of already-decoded audio repeated for stitching
+
+# Streaming ASR: decode the open utterance every STREAMING_STEP seconds and act
+# on the prefix that two consecutive partial hypotheses agree on (decoded by the
+# fast model when ASR_CASCADE is on). Partials start only once an utterance passes the endpointer's length gates, so early
+# execution never acts on speech that would be discarded as too short
+STREAMING_ASR = os.environ.get('STREAMING_ASR', 'false').lower() == 'true'
+STREAMING_STEP = float(os.environ.get('STREAMING_STEP', '0.6'))
 MAX_MODEL_LOAD_RETRIES = 3
 MODEL_LOAD_RETRY_DELAY = 5  # seconds
 MODEL_DOWNLOAD_TIMEOUT = 600  # 10 minutes timeout for model download
@@ -41,23 +56,246 @@ MAX_REPETITIONS = 1  # More aggressive repetition filtering
 ECHO_THRESHOLD = 0.75  # More sensitive echo detection
 MIN_SEGMENT_DURATION = 1.0  # Longer minimum segment duration
 FEEDBACK_WINDOW = 5  # Window size for feedback detection in seconds
+ONSET_FRAMES = 2  # Consecutive speech frames needed to open a segment
+PRE_ROLL_DURATION = 0.3  # Seconds of audio kept before a segment's onset
+COMMAND_START_TIMEOUT = 4.0  # Seconds to wait for a command after the wake word
+MAX_COMMAND_DURATION = 6.0  # Cap on the post-wake capture, in seconds
+MIN_COMMAND_SPEECH = 0.3  # Minimum speech in a post-wake command, in seconds
+
+# Processing pipeline configuration
+# Drop policies: 'drop_oldest', 'drop_newest' or 'block' (block is never used
+# for the frame queue, since the audio callback must not stall)
+FRAME_QUEUE_DEPTH = int(os.environ.get('FRAME_QUEUE_DEPTH', '64'))
+FRAME_DROP_POLICY = os.environ.get('FRAME_DROP_POLICY', 'drop_oldest')
+
+# ASR executor: a bounded priority queue shared by ASR_WORKERS threads. When
+# full, the lowest-priority job is shed; jobs older than ASR_JOB_DEADLINE
+# seconds are dropped instead of transcribed.
+ASR_QUEUE_DEPTH = int(os.environ.get('ASR_QUEUE_DEPTH', '4'))
+ASR_WORKERS = int(os.environ.get('ASR_WORKERS', '1'))
+ASR_JOB_DEADLINE = float(os.environ.get('ASR_JOB_DEADLINE', '5.0'))
+ASR_STATS_INTERVAL = 60  # seconds between ASR executor stats log lines
+
+# ASR job priorities (lower runs first)
+PRIORITY_WAKE = 0
+PRIORITY_CONTINUOUS = 1
+PRIORITY_PARTIAL = 2
+
+# Optional persistence of transcribed segments (written by a background thread)
+SAVE_AUDIO_SEGMENTS = os.environ.get('SAVE_AUDIO_SEGMENTS', 'false').lower() == 'true'
+AUDIO_SAVE_DIR = os.environ.get('AUDIO_SAVE_DIR', '/audio')
+SAVE_QUEUE_DEPTH = int(os.environ.get('SAVE_QUEUE_DEPTH', '4'))
+
+# Capture ring buffer storage: '' keeps it private to this process; a shared
+# memory name (e.g. 'wake_word_audio') or a file path (e.g. /audio/capture.ring)
+# exports it so other processes can attach read-only
+AUDIO_RING = os.environ.get('AUDIO_RING', '')
+AUDIO_RING_DURATION = float(os.environ.get('AUDIO_RING_DURATION', str(BUFFER_DURATION * 2)))
 
 # Feature flags from environment
 WAKE_WORD_ENABLED = os.environ.get('ENABLE_WAKE_WORD', 'false').lower() == 'true'
 SPEECH_ENABLED = os.environ.get('ENABLE_SPEECH_FEATURES', 'true').lower() == 'true'
 
-# Wake word models to use (only if wake word is enabled)
-WAKE_WORDS = ["hey_jarvis"]  # Using hey_jarvis as it's more similar to "hey gaja"
+def parse_wake_word_models(spec, default_threshold=DETECTION_THRESHOLD):
+    """Parse 'name[:threshold],/path/model.onnx[:threshold],...' into (model, key, threshold) tuples.
+
+    A model is either a bundled openWakeWord model name or a path to a custom
+    model file; its prediction key is the file name without extension.
+    """
+    models = []
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model, sep, threshold = entry.rpartition(':')
+        if not sep or not threshold.replace('.', '', 1).isdigit():
+            model, threshold = entry, default_threshold
+        key = os.path.splitext(os.path.basename(model))[0]
+        models.append((model, key, float(threshold)))
+    return models
+
+WAKE_WORD_FRAMEWORKS = {'.onnx': 'onnx', '.tflite': 'tflite'}
+
+def wake_word_inference_framework(models):
+    """Return the openWakeWord inference framework for the custom model files, or None for its default.
+
+    Bundled model names carry no extension and load in either framework;
+    custom model files must all use the same one.
+    """
+    frameworks = set()
+    for model, _, _ in models:
+        extension = os.path.splitext(model)[1].lower()
+        if not extension:
+            continue
+        if extension not in WAKE_WORD_FRAMEWORKS:
+            raise ValueError(f"Unsupported wake word model file: {model} (expected .onnx or .tflite)")
+        frameworks.add(WAKE_WORD_FRAMEWORKS[extension])
+    if len(frameworks) > 1:
+        raise ValueError(f"Wake word models mix .onnx and .tflite files: {', '.join(m for m, _, _ in models)}")
+    return frameworks.pop() if frameworks else None
+
+# Wake word models to use (only if wake word is enabled). Only these models are
+# loaded, since every loaded model runs inference on every chunk.
+# Using hey_jarvis by default as it's more similar to "hey gaja"
+WAKE_WORD_MODELS = parse_wake_word_models(os.environ.get('WAKE_WORD_MODELS', 'hey_jarvis'))
+WAKE_WORDS = {key: threshold for _, key, threshold in WAKE_WORD_MODELS}  # Prediction key -> threshold
 WAKE_WORD_ALIAS = "gaja"  # What we print when wake word is detected
+WAKE_WORD_SMOOTHING = os.environ.get('WAKE_WORD_SMOOTHING', 'mean')  # 'mean' or 'peak'
+WAKE_WORD_SMOOTHING_FRAMES = int(os.environ.get('WAKE_WORD_SMOOTHING_FRAMES', '3'))
+WAKE_WORD_REFRACTORY = float(os.environ.get('WAKE_WORD_REFRACTORY', '2.0'))  # seconds after a trigger
+
+# Optionally host the Whisper model in a supervised child process so its
+# Python-level work never contends for the GIL with audio capture. Each tier
+# has one child serving one request at a time: it loads the model with a
+# single worker and the full thread budget, and extra ASR_WORKERS only queue.
+ASR_PROCESS = os.environ.get('ASR_PROCESS', 'false').lower() == 'true'
+ASR_PROCESS_CPUS = os.environ.get('ASR_PROCESS_CPUS', '')  # e.g. "2,3" to pin the ASR process
+ASR_PROCESS_TIMEOUT = float(os.environ.get('ASR_PROCESS_TIMEOUT', '30'))  # seconds per transcription
+
+# ASR decoding. ASR_VOCAB_BIAS biases Whisper toward the command vocabulary:
+# 'off', 'prompt' (initial_prompt) or 'hotwords' (needs faster-whisper >= 1.0).
+# Biased decoding also drops timestamps and uses ASR_BIASED_BEAM_SIZE.
+ASR_BEAM_SIZE = int(os.environ.get('ASR_BEAM_SIZE', '5'))
+ASR_VOCAB_BIAS = os.environ.get('ASR_VOCAB_BIAS', 'off')
+ASR_BIASED_BEAM_SIZE = int(os.environ.get('ASR_BIASED_BEAM_SIZE', '2'))
+
+# Two-tier ASR cascade: a fast model transcribes first; its result is used if
+# it is confident and parses as a command, otherwise the main model re-runs
+ASR_CASCADE = os.environ.get('ASR_CASCADE', 'false').lower() == 'true'
+ASR_FAST_MODEL_TYPE = os.environ.get('ASR_FAST_MODEL_TYPE', 'tiny')
+CASCADE_MIN_AVG_LOGPROB = float(os.environ.get('CASCADE_MIN_AVG_LOGPROB', '-0.6'))
+CASCADE_MAX_NO_SPEECH_PROB = float(os.environ.get('CASCADE_MAX_NO_SPEECH_PROB', '0.5'))
+
+# Whisper confidence gates. Segments that look like silence (high no-speech
+# probability together with a low average log-probability) or hallucination
+# (highly repetitive, i.e. high compression ratio) are dropped, and decoding
+# stops at the first failing segment.
+ASR_CONFIDENCE_GATING = os.environ.get('ASR_CONFIDENCE_GATING', 'true').lower() == 'true'
+GATE_NO_SPEECH_PROB = float(os.environ.get('GATE_NO_SPEECH_PROB', '0.6'))
+GATE_MIN_AVG_LOGPROB = float(os.environ.get('GATE_MIN_AVG_LOGPROB', '-1.0'))
+GATE_MAX_COMPRESSION_RATIO = float(os.environ.get('GATE_MAX_COMPRESSION_RATIO', '2.4'))
+
+# CTranslate2 runtime settings. 'auto' derives them from the container CPU
+# quota and affinity mask, or from a saved --calibrate run for this model
+ASR_CPU_THREADS = os.environ.get('ASR_CPU_THREADS', 'auto')
+ASR_NUM_WORKERS = os.environ.get('ASR_NUM_WORKERS', 'auto')
+ASR_COMPUTE_TYPE = os.environ.get('ASR_COMPUTE_TYPE', 'auto')
+ASR_CALIBRATION_FILE = os.environ.get(
+    'ASR_CALIBRATION_FILE',
+    os.path.join(os.environ.get('WHISPER_MODEL_PATH', '/models'), 'asr_calibration.json')
+)
+CALIBRATION_COMPUTE_TYPES = ['int8', 'int8_float32']
 
 # Home Assistant Configuration
 HASS_HOST = os.environ.get('HASS_HOST', 'http://homeassistant.local:8123')
 HASS_TOKEN = os.environ.get('HASS_TOKEN')
+HASS_CONNECT_TIMEOUT = float(os.environ.get('HASS_CONNECT_TIMEOUT', '2.0'))
+HASS_READ_TIMEOUT = float(os.environ.get('HASS_READ_TIMEOUT', '5.0'))
+HASS_MAX_RETRIES = int(os.environ.get('HASS_MAX_RETRIES', '2'))
+HASS_RETRY_BACKOFF = float(os.environ.get('HASS_RETRY_BACKOFF', '0.2'))  # Base delay in seconds, doubled per retry
+HASS_POOL_SIZE = int(os.environ.get('HASS_POOL_SIZE', '4'))
+HASS_RETRY_STATUS = {502, 503, 504}  # Proxy/restart responses where the call never reached a service
+HASS_TRANSPORT = os.environ.get('HASS_TRANSPORT', 'websocket')  # 'websocket' (REST fallback) or 'rest'
+HASS_WS_URL = os.environ.get(
+    'HASS_WS_URL', HASS_HOST.replace('https://', 'wss://', 1).replace('http://', 'ws://', 1) + '/api/websocket'
+)
+HASS_WS_PING_INTERVAL = float(os.environ.get('HASS_WS_PING_INTERVAL', '20'))
+HASS_WS_RECONNECT_MAX = float(os.environ.get('HASS_WS_RECONNECT_MAX', '30'))  # Cap on reconnect backoff in seconds
+HASS_REGISTRY = os.environ.get('HASS_REGISTRY', 'true').lower() == 'true'  # Resolve names via the entity/area registries
+CONTROLLABLE_DOMAINS = ('light', 'switch', 'fan', 'input_boolean')  # Entity domains spoken commands may target
+
+# Fuzzy name resolution for ASR near-misses ("wohnzimer", "schlaf zimmer")
+FUZZY_MATCHING = os.environ.get('FUZZY_MATCHING', 'true').lower() == 'true'
+FUZZY_MAX_DISTANCE = int(os.environ.get('FUZZY_MAX_DISTANCE', '2'))  # Edit distance cap for long names
+FUZZY_MIN_LENGTH = 4  # Shorter spans are too ambiguous to correct
+
+def _cgroup_cpu_quota():
+    """Return the cgroup CPU quota in cores, or None if unlimited or unknown"""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+def available_cpus():
+    """Number of CPUs this process may actually use (affinity mask and cgroup quota)"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))  # Round down so we never oversubscribe
+    return cpus
+
+def asr_num_workers():
+    """Number of transcriptions the model runs concurrently"""
+    if ASR_NUM_WORKERS != 'auto':
+        return max(1, int(ASR_NUM_WORKERS))
+    return max(1, ASR_WORKERS)
+
+def _load_calibration(model_name, cpus, num_workers):
+    """Return saved calibration settings for this model, CPU budget and worker count, if any"""
+    try:
+        with open(ASR_CALIBRATION_FILE) as f:
+            calibration = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (calibration.get('model') != model_name or calibration.get('cpus') != cpus
+            or calibration.get('num_workers', 1) != num_workers):
+        return None
+    return calibration
+
+def asr_runtime_settings(model_name, num_workers=None):
+    """Choose cpu_threads, num_workers and compute_type for a model on this machine.
 
-def initialize_asr_model():
+    num_workers overrides the configured worker count, splitting the CPU
+    budget between that many concurrent transcriptions.
+    """
+    cpus = available_cpus()
+    workers = num_workers or asr_num_workers()
+    # Leave a core for capture, VAD and wake word scoring when there is room
+    budget = cpus - 1 if cpus >= 3 else cpus
+    settings = {
+        'cpu_threads': max(1, budget // workers),
+        'num_workers': workers,
+        'compute_type': 'int8',
+        'source': f'cpu quota ({cpus} cpus)',
+    }
+
+    calibration = _load_calibration(model_name, cpus, workers)
+    if calibration is not None:
+        settings['cpu_threads'] = calibration['cpu_threads']
+        settings['compute_type'] = calibration['compute_type']
+        settings['source'] = f"calibration (rtf {calibration['rtf']:.3f})"
+
+    if ASR_CPU_THREADS != 'auto':
+        settings['cpu_threads'] = int(ASR_CPU_THREADS)
+    if ASR_COMPUTE_TYPE != 'auto':
+        settings['compute_type'] = ASR_COMPUTE_TYPE
+    return settings
+
+def initialize_asr_model(model_name=None, num_workers=None):
     """Initialize the ASR model with retries and timeout"""
+    from faster_whisper import WhisperModel
+
     model_path = os.environ.get('WHISPER_MODEL_PATH', '/models')
-    model_name = os.environ.get('WHISPER_MODEL_TYPE', 'base')
+    model_name = model_name or os.environ.get('WHISPER_MODEL_TYPE', 'base')
     
     start_time = time.time()
     for attempt in range(MAX_MODEL_LOAD_RETRIES):
@@ -66,13 +304,17 @@ def initialize_asr_model():
                 logger.error("Model download timeout exceeded")
                 raise TimeoutError("Model download took too long")
                 
-            logger.info(f"Loading ASR model (attempt {attempt + 1}/{MAX_MODEL_LOAD_RETRIES})")
+            settings = asr_runtime_settings(model_name, num_workers)
+            logger.info(f"Loading ASR model {model_name} (attempt {attempt + 1}/{MAX_MODEL_LOAD_RETRIES}): "
+                        f"cpu_threads={settings['cpu_threads']}, num_workers={settings['num_workers']}, "
+                        f"compute_type={settings['compute_type']} from {settings['source']}")
             model = WhisperModel(
                 model_size_or_path=model_name,
                 device="cpu",
-                compute_type="int8",
+                compute_type=settings['compute_type'],
+                cpu_threads=settings['cpu_threads'],
                 download_root=model_path,
-                num_workers=1  # Reduce concurrent downloads
+                num_workers=settings['num_workers']
             )
             logger.info("ASR model loaded successfully")
             return model
@@ -85,91 +327,1381 @@ def initialize_asr_model():
                 logger.error("Failed to load ASR model after all retries")
                 raise
 
-# Initialize the ASR model with retries
-try:
-    asr_model = initialize_asr_model()
-except Exception as e:
-    logger.error(f"Critical error initializing ASR model: {e}")
-    raise
+ASRSegment = namedtuple('ASRSegment', [
+    'start', 'end', 'text', 'avg_logprob', 'no_speech_prob', 'compression_ratio'
+])
+ASRInfo = namedtuple('ASRInfo', ['language', 'language_probability', 'duration'])
+
+def segment_gate_failure(segment):
+    """Return why a transcribed segment should be dropped, or None if it passes"""
+    if segment.no_speech_prob > GATE_NO_SPEECH_PROB and segment.avg_logprob < GATE_MIN_AVG_LOGPROB:
+        return f"silence (no_speech_prob {segment.no_speech_prob:.2f}, avg_logprob {segment.avg_logprob:.2f})"
+    if segment.compression_ratio > GATE_MAX_COMPRESSION_RATIO:
+        return f"hallucination (compression_ratio {segment.compression_ratio:.2f})"
+    return None
+
+def gate_segments(segments):
+    """Yield segments until one fails the confidence gates.
+
+    Stopping early means faster-whisper's lazy generator never decodes the
+    remaining segments of a noisy buffer.
+    """
+    for segment in segments:
+        if ASR_CONFIDENCE_GATING:
+            reason = segment_gate_failure(segment)
+            if reason is not None:
+                logger.debug(f"Dropping segment '{segment.text.strip()}': {reason}")
+                break
+        yield segment
+
+def _parse_cpu_list(spec):
+    """Parse '2,3' or '2-3' into a set of CPU ids"""
+    cpus = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition('-')
+        cpus.update(range(int(low), int(high or low) + 1))
+    return cpus
+
+def _asr_process_main(conn, shm_name, capacity, cpus, model_name=None):
+    """Entry point of the ASR child process: load the model, then serve transcribe requests"""
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    # Spawned children share the parent's resource tracker, which unlinks the
+    # block only once the parent is gone
+    shm = shared_memory.SharedMemory(name=shm_name)
+    audio = np.ndarray((capacity,), dtype=np.float32, buffer=shm.buf)
+    rings = {}  # Attached shared capture rings by backing name
+
+    try:
+        # Requests reach the child one at a time, so one worker gets the whole thread budget
+        model = initialize_asr_model(model_name, num_workers=1)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        shm.close()
+        return
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == 'stop':
+            break
+        try:
+            if message[0] == 'transcribe_window':
+                # Zero-copy slice of the capture ring owned by the parent
+                _, backing, start_sample, end_sample, kwargs = message
+                if backing not in rings:
+                    rings[backing] = SharedRingReader(backing)
+                samples = rings[backing].view(start_sample, end_sample)
+            else:
+                _, n_samples, kwargs = message
+                samples = audio[:n_samples]
+            segments, info = model.transcribe(samples, **kwargs)
+            result = [
+                ASRSegment(s.start, s.end, s.text, s.avg_logprob, s.no_speech_prob, s.compression_ratio)
+                for s in gate_segments(segments)
+            ]
+            conn.send(('ok', (result, ASRInfo(info.language, info.language_probability, info.duration))))
+        except Exception as e:
+            conn.send(('error', f"{type(e).__name__}: {e}"))
+
+    for ring in rings.values():
+        ring.close()
+    del audio
+    shm.close()
+
+class ASRProcess:
+    """Proxy for a WhisperModel hosted in a supervised child process.
+
+    Audio is passed through a shared memory block and results come back over
+    a pipe. transcribe() mirrors WhisperModel.transcribe, returning an iterator
+    of ASRSegment and an ASRInfo. If the child dies or hangs it is restarted
+    and the in-flight request raises.
+    """
+
+    def __init__(self, capacity=SAMPLE_RATE * BUFFER_DURATION, cpus=None, timeout=ASR_PROCESS_TIMEOUT,
+                 model_name=None):
+        self.capacity = int(capacity)
+        self.model_name = model_name
+        self.cpus = cpus
+        self.timeout = timeout
+        self.restarts = 0
+        self._failures = 0  # Consecutive failed requests, for restart back-off
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')  # Never fork a process with PortAudio threads
+        self._shm = shared_memory.SharedMemory(create=True, size=self.capacity * 4)
+        self._audio = np.ndarray((self.capacity,), dtype=np.float32, buffer=self._shm.buf)
+        self._process = None
+        self._conn = None
+        self._start()
+
+    def _start(self):
+        """Spawn the child process and wait until its model is loaded"""
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_asr_process_main,
+            args=(child_conn, self._shm.name, self.capacity, self.cpus, self.model_name),
+            name="asr-process",
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+        if not parent_conn.poll(MODEL_DOWNLOAD_TIMEOUT):
+            self._kill()
+            raise TimeoutError("ASR process did not become ready")
+        try:
+            status, payload = parent_conn.recv()
+        except EOFError:
+            self._kill()
+            raise RuntimeError("ASR process exited during startup")
+        if status != 'ready':
+            self._kill()
+            raise RuntimeError(f"ASR process failed to load model: {payload}")
+        logger.info(f"ASR process ready (pid {self._process.pid})")
+
+    def _kill(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.kill()
+        if self._process is not None:
+            self._process.join(timeout=5)
+        if self._conn is not None:
+            self._conn.close()
+
+    def _restart(self, reason):
+        """Replace a dead or hung child process"""
+        self.restarts += 1
+        self._failures += 1
+        logger.error(f"Restarting ASR process ({reason}), restart #{self.restarts}")
+        self._kill()
+        if self._failures > 1:
+            time.sleep(MODEL_LOAD_RETRY_DELAY)  # Back off if the child keeps failing
+        self._start()
+
+    def transcribe(self, audio, **kwargs):
+        """Transcribe a float32 array, or an AudioWindow of a shared ring, in the child process"""
+        if isinstance(audio, AudioWindow):
+            message = ('transcribe_window', audio.backing, audio.start_sample, audio.end_sample, kwargs)
+        else:
+            audio = np.asarray(audio, dtype=np.float32)
+            if len(audio) > self.capacity:
+                logger.warning(f"Audio longer than ASR process buffer, keeping last {self.capacity} samples")
+                audio = audio[-self.capacity:]
+            message = ('transcribe', len(audio), kwargs)
+
+        with self._lock:
+            if not self._process.is_alive():
+                self._restart(f"exit code {self._process.exitcode}")
+            if message[0] == 'transcribe':
+                self._audio[:len(audio)] = audio
+            self._conn.send(message)
+
+            if not self._conn.poll(self.timeout):
+                self._restart("transcription timed out")
+                raise TimeoutError("ASR process transcription timed out")
+            try:
+                status, payload = self._conn.recv()
+            except EOFError:
+                self._restart("process died during transcription")
+                raise RuntimeError("ASR process died during transcription")
+            self._failures = 0
+
+        if status != 'ok':
+            raise RuntimeError(f"ASR process error: {payload}")
+        segments, info = payload
+        return iter(segments), info
+
+    def close(self):
+        """Stop the child process and release the shared memory"""
+        with self._lock:
+            try:
+                self._conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            if self._process is not None:
+                self._process.join(timeout=5)
+            self._kill()
+            del self._audio
+            self._shm.close()
+            self._shm.unlink()
+
+# ASR models are loaded on first use (or explicitly via get_asr_model() at
+# startup) so that importing this module stays cheap. Tiers: 'main' is
+# WHISPER_MODEL_TYPE, 'fast' is the cascade's ASR_FAST_MODEL_TYPE.
+_asr_models = {}
+_asr_model_lock = threading.Lock()
+_asr_tier_locks = {}  # One lock per tier so tiers can load concurrently
+
+def get_asr_model(tier='main'):
+    """Return the shared ASR model (or ASR process proxy) for a tier, loading it on first use"""
+    model = _asr_models.get(tier)
+    if model is None:
+        with _asr_model_lock:
+            tier_lock = _asr_tier_locks.setdefault(tier, threading.Lock())
+        with tier_lock:
+            model = _asr_models.get(tier)
+            if model is None:
+                model_name = ASR_FAST_MODEL_TYPE if tier == 'fast' else None
+                try:
+                    if ASR_PROCESS:
+                        cpus = _parse_cpu_list(ASR_PROCESS_CPUS) or None
+                        model = ASRProcess(cpus=cpus, model_name=model_name)
+                    else:
+                        model = initialize_asr_model(model_name)
+                except Exception as e:
+                    logger.error(f"Critical error initializing ASR model: {e}")
+                    raise
+                with _asr_model_lock:
+                    _asr_models[tier] = model
+    return model
+
+def shutdown_asr_model():
+    """Release the ASR models, stopping any ASR processes"""
+    with _asr_model_lock:
+        for model in _asr_models.values():
+            if isinstance(model, ASRProcess):
+                model.close()
+        _asr_models.clear()
+
+def segment_confidence(segments):
+    """Return (mean avg_logprob, max no_speech_prob) over transcribed segments"""
+    if not segments:
+        return float('-inf'), 1.0
+    avg_logprob = sum(segment.avg_logprob for segment in segments) / len(segments)
+    no_speech_prob = max(segment.no_speech_prob for segment in segments)
+    return avg_logprob, no_speech_prob
+
+def transcribe_audio(audio, options):
+    """Transcribe audio, going through the fast cascade tier first when enabled.
+
+    Returns (text, segments, info).
+    """
+    if ASR_CASCADE:
+        segments, info = get_asr_model('fast').transcribe(audio, **options)
+        segments = list(gate_segments(segments))
+        text = " ".join(segment.text for segment in segments)
+        avg_logprob, no_speech_prob = segment_confidence(segments)
+        confident = (
+            avg_logprob >= CASCADE_MIN_AVG_LOGPROB and
+            no_speech_prob <= CASCADE_MAX_NO_SPEECH_PROB
+        )
+        if confident and parse_command(text) is not None:
+            logger.debug(f"Cascade: fast model accepted (avg_logprob {avg_logprob:.2f}, "
+                         f"no_speech {no_speech_prob:.2f})")
+            return text, segments, info
+        logger.debug(f"Cascade: escalating to main model (avg_logprob {avg_logprob:.2f}, "
+                     f"no_speech {no_speech_prob:.2f})")
+
+    segments, info = get_asr_model().transcribe(audio, **options)
+    segments = list(gate_segments(segments))
+    return " ".join(segment.text for segment in segments), segments, info
+
+def initialize_wake_word_model():
+    """Initialize the openWakeWord model"""
+    from openwakeword import Model
+
+    logger.info(f"Initializing wake word models: {', '.join(WAKE_WORDS)}")
+    options = {}
+    framework = wake_word_inference_framework(WAKE_WORD_MODELS)
+    if framework is not None:
+        options['inference_framework'] = framework
+    model = Model(
+        wakeword_models=[model for model, _, _ in WAKE_WORD_MODELS],
+        vad_threshold=0.5,
+        **options
+    )
+    logger.info("Wake word model initialized successfully")
+    return model
+
+def _warm_up_signals(duration):
+    """Return (silence, tone) float32 test signals of the given duration"""
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    silence = np.zeros(len(t), dtype=np.float32)
+    tone = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    return silence, tone
+
+def warm_up_asr_model(model):
+    """Run short inferences so the first real command does not pay first-call costs"""
+    for signal in _warm_up_signals(1.0):
+        segments, _ = model.transcribe(signal, language="de", beam_size=1, temperature=0)
+        for _ in segments:  # Segments are generated lazily
+            pass
+
+def warm_up_wake_word_model(model):
+    """Feed a few chunks of silence and tone through the wake word model"""
+    for signal in _warm_up_signals(CHUNK_SIZE * 4 / SAMPLE_RATE):
+        for i in range(0, len(signal), CHUNK_SIZE):
+            model.predict(signal[i:i + CHUNK_SIZE])
+    if hasattr(model, 'reset'):
+        model.reset()  # Drop warm-up audio from the model's internal buffers
+
+_hass_session = None
+_hass_session_lock = threading.Lock()
+
+def get_hass_session():
+    """Return the shared keep-alive session for Home Assistant, creating it on first use"""
+    global _hass_session
+    with _hass_session_lock:
+        if _hass_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=HASS_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {HASS_TOKEN}",
+                "Content-Type": "application/json",
+            })
+            _hass_session = session
+        return _hass_session
+
+def close_hass_session():
+    """Close pooled connections to Home Assistant"""
+    global _hass_session
+    with _hass_session_lock:
+        if _hass_session is not None:
+            _hass_session.close()
+            _hass_session = None
+
+def _hass_request(method, path, **kwargs):
+    """Send a request over the pooled session with timeouts and bounded, jittered retries.
+
+    Only failures where the request cannot have been handled are retried:
+    connection errors (including connect timeouts) and gateway/restart statuses.
+    A read timeout is not retried, since a toggle must not be applied twice.
+    """
+    session = get_hass_session()
+    url = f"{HASS_HOST}{path}"
+    for attempt in range(HASS_MAX_RETRIES + 1):
+        try:
+            response = session.request(method, url, timeout=(HASS_CONNECT_TIMEOUT, HASS_READ_TIMEOUT), **kwargs)
+            if response.status_code not in HASS_RETRY_STATUS or attempt == HASS_MAX_RETRIES:
+                response.raise_for_status()
+                return response
+            error = f"HTTP {response.status_code}"
+        except requests.exceptions.ConnectionError as e:
+            if attempt == HASS_MAX_RETRIES:
+                raise
+            error = e
+        delay = HASS_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+        logger.warning(f"Home Assistant request failed ({error}), retrying in {delay:.2f}s")
+        time.sleep(delay)
+
+class HassWebSocket:
+    """Persistent, authenticated connection to the Home Assistant WebSocket API.
+
+    A background thread owns the socket: it connects and authenticates,
+    reconnects with backoff, routes results to waiting callers by message id,
+    and sends a Home Assistant ping whenever the socket has been idle for
+    ping_interval. Calls from any thread are pipelined over the one socket.
+    """
+
+    def __init__(self, url, token, ping_interval=HASS_WS_PING_INTERVAL, call_timeout=HASS_READ_TIMEOUT):
+        self.url = url
+        self.token = token
+        self.ping_interval = ping_interval
+        self.call_timeout = call_timeout
+        self._socket = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._send_lock = threading.Lock()  # Home Assistant requires ids to increase in send order
+        self._subscriptions = {}  # event_type -> callback, renewed on every connection
+        self._event_handlers = {}  # subscription id on the current connection -> callback
+        self._connect_listeners = []
+        self._sync_lock = threading.Lock()  # Serializes _sync, so each event type is subscribed once
+        self._synced_socket = None
+        self._subscribed = set()  # Event types subscribed on _synced_socket
+        self._notified = 0  # Connect listeners notified of _synced_socket
+        self._missed = False  # A subscription on _synced_socket failed, so events may have been missed
+        self._connected = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hass-websocket", daemon=True)
+
+    @property
+    def connected(self):
+        return self._connected.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def wait_connected(self, timeout=None):
+        return self._connected.wait(timeout)
+
+    def close(self):
+        self._stop_event.set()
+        socket = self._socket
+        if socket is not None:
+            socket.close()
+        self._thread.join(timeout=2)
+
+    def _run(self):
+        from websockets.sync.client import connect
+
+        failures = 0
+        while not self._stop_event.is_set():
+            try:
+                with connect(self.url, open_timeout=HASS_CONNECT_TIMEOUT, close_timeout=1) as socket:
+                    self._authenticate(socket)
+                    self._socket = socket
+                    self._connected.set()
+                    failures = 0
+                    logger.info(f"Home Assistant WebSocket connected to {self.url}")
+                    self._schedule_sync()
+                    self._receive(socket)
+            except Exception as e:
+                if not self._stop_event.is_set():
+                    logger.warning(f"Home Assistant WebSocket disconnected: {e}")
+            finally:
+                self._connected.clear()
+                self._socket = None
+                self._fail_pending()
+            failures += 1
+            delay = min(HASS_WS_RECONNECT_MAX, HASS_RETRY_BACKOFF * 2 ** failures) * random.uniform(0.5, 1.5)
+            self._stop_event.wait(delay)
+
+    def _authenticate(self, socket):
+        message = json.loads(socket.recv(timeout=HASS_CONNECT_TIMEOUT))
+        if message.get('type') != 'auth_required':
+            raise ConnectionError(f"Unexpected greeting '{message.get('type')}'")
+        socket.send(json.dumps({'type': 'auth', 'access_token': self.token}))
+        message = json.loads(socket.recv(timeout=HASS_CONNECT_TIMEOUT))
+        if message.get('type') != 'auth_ok':
+            raise ConnectionError(f"Authentication failed: {message.get('message', message.get('type'))}")
+
+    def _receive(self, socket):
+        ping_id = None
+        while not self._stop_event.is_set():
+            try:
+                message = json.loads(socket.recv(timeout=self.ping_interval))
+            except TimeoutError:
+                if ping_id is not None:
+                    raise ConnectionError("No pong within the ping interval")
+                ping_id = self._send(socket, {'type': 'ping'})
+                continue
+            if message.get('id') == ping_id:
+                ping_id = None
+            elif message.get('type') == 'result':
+                self._resolve(message)
+            elif message.get('type') == 'event':
+                handler = self._event_handlers.get(message.get('id'))
+                if handler is not None:
+                    try:
+                        handler(message.get('event') or {})
+                    except Exception as e:
+                        logger.error(f"Error handling Home Assistant event: {e}")
+
+    def _send(self, socket, message, future=None, handler=None):
+        with self._send_lock:
+            message_id = next(self._ids)
+            if future is not None:
+                self._pending[message_id] = future
+            if handler is not None:
+                self._event_handlers[message_id] = handler
+            try:
+                socket.send(json.dumps(dict(message, id=message_id)))
+            except Exception:
+                self._pending.pop(message_id, None)
+                self._event_handlers.pop(message_id, None)
+                raise
+        return message_id
+
+    def _resolve(self, message):
+        future = self._pending.pop(message.get('id'), None)
+        if future is None:
+            return
+        if message.get('success'):
+            future.set_result(message.get('result'))
+        else:
+            error = message.get('error') or {}
+            future.set_exception(RuntimeError(f"{error.get('code', 'error')}: {error.get('message', 'request failed')}"))
+
+    def _fail_pending(self):
+        with self._send_lock:
+            pending, self._pending = self._pending, {}
+            self._event_handlers = {}
+        for future in pending.values():
+            # Not a ConnectionError: the call may already have been carried out
+            future.set_exception(RuntimeError("Home Assistant WebSocket closed before the call was acknowledged"))
+
+    def _schedule_sync(self):
+        # Requests block on the receiver thread's loop, so subscribing never happens on it or on callers
+        threading.Thread(target=self._sync, name="hass-websocket-sync", daemon=True).start()
+
+    def _sync(self):
+        """Subscribe the current connection to recorded event types it lacks, then notify new listeners.
 
-def send_command_to_hass(domain, service, entity_id):
-    """Send command to Home Assistant"""
+        Failed subscriptions are retried with backoff while the connection
+        lasts. Once one of them succeeds, every listener is notified again,
+        since events may have been missed in the meantime.
+        """
+        failures = 0
+        while True:
+            with self._sync_lock:
+                socket = self._socket
+                if socket is None:
+                    return  # The next connection syncs again
+                if self._synced_socket is not socket:
+                    self._synced_socket = socket
+                    self._subscribed = set()
+                    self._notified = 0
+                    self._missed = False
+                failed = []
+                for event_type, callback in list(self._subscriptions.items()):
+                    if event_type in self._subscribed:
+                        continue
+                    try:
+                        self._subscribe(socket, event_type, callback)
+                    except Exception as e:
+                        logger.warning(f"Could not subscribe to {event_type} events: {e}")
+                        failed.append(event_type)
+                        continue
+                    self._subscribed.add(event_type)
+                    if self._missed:
+                        self._notified = 0
+                self._missed = bool(failed)
+                listeners = self._connect_listeners[self._notified:]
+                self._notified += len(listeners)
+                for listener in listeners:
+                    listener()
+            if not failed:
+                return
+            failures += 1
+            delay = min(HASS_WS_RECONNECT_MAX, HASS_RETRY_BACKOFF * 2 ** failures)
+            logger.info(f"Retrying {len(failed)} Home Assistant subscriptions in {delay:.1f}s")
+            if self._stop_event.wait(delay):
+                return
+
+    def _subscribe(self, socket, event_type, callback):
+        future = Future()
+        message_id = self._send(socket, {'type': 'subscribe_events', 'event_type': event_type}, future, callback)
+        try:
+            future.result(self.call_timeout)
+        except Exception:
+            self._event_handlers.pop(message_id, None)  # Ignore events of a subscription we gave up on
+            raise
+        finally:
+            self._pending.pop(message_id, None)
+
+    def subscribe(self, event_type, callback):
+        """Call callback(event) on the receiver thread for each event_type event, across reconnects.
+
+        Only records the subscription; it is made in the background, so this
+        never blocks or raises when Home Assistant is slow or unreachable.
+        """
+        self._subscriptions[event_type] = callback
+        if self.connected:
+            self._schedule_sync()
+
+    def add_connect_listener(self, listener):
+        """Call listener() on a helper thread once subscriptions are in place on each connection"""
+        self._connect_listeners.append(listener)
+        if self.connected:
+            self._schedule_sync()
+
+    def request(self, message, timeout=None):
+        """Send a command and wait for its result.
+
+        Raises ConnectionError only when the message was never sent, so callers
+        can safely retry those over REST.
+        """
+        socket = self._socket
+        if socket is None or not self._connected.is_set():
+            raise ConnectionError("Home Assistant WebSocket not connected")
+        future = Future()
+        try:
+            message_id = self._send(socket, message, future)
+        except Exception as e:
+            raise ConnectionError(f"Home Assistant WebSocket send failed: {e}") from e
+        try:
+            return future.result(timeout or self.call_timeout)
+        finally:
+            self._pending.pop(message_id, None)
+
+    def call_service(self, domain, service, service_data=None, target=None):
+        message = {'type': 'call_service', 'domain': domain, 'service': service, 'service_data': service_data or {}}
+        if target:
+            message['target'] = target
+        return self.request(message)
+
+_hass_websocket = None
+_hass_websocket_unavailable = False
+_hass_websocket_lock = threading.Lock()
+
+def get_hass_websocket():
+    """Return the shared, started HassWebSocket, or None when the WebSocket transport is not in use"""
+    global _hass_websocket, _hass_websocket_unavailable
+    if HASS_TRANSPORT != 'websocket' or not HASS_TOKEN:
+        return None
+    with _hass_websocket_lock:
+        if _hass_websocket is None and not _hass_websocket_unavailable:
+            try:
+                import websockets.sync.client  # noqa: F401
+            except ImportError:
+                logger.warning("websockets is not installed, sending Home Assistant commands over REST")
+                _hass_websocket_unavailable = True
+                return None
+            _hass_websocket = HassWebSocket(HASS_WS_URL, HASS_TOKEN).start()
+        return _hass_websocket
+
+def close_hass_websocket():
+    """Close the Home Assistant WebSocket connection"""
+    global _hass_websocket
+    with _hass_websocket_lock:
+        if _hass_websocket is not None:
+            _hass_websocket.close()
+            _hass_websocket = None
+
+def normalize_spoken_name(name):
+    """Normalize a friendly name, alias or transcript for name lookups"""
+    words = name.replace('_', ' ').replace('-', ' ').split()
+    return " ".join(word for word in map(_normalize_word, words) if word)
+
+class HassRegistry:
+    """Local cache of Home Assistant entities and areas, indexed by spoken name.
+
+    Loaded over the WebSocket connection, and loaded again after every
+    reconnect since events may have been missed. In between it is kept current
+    from state_changed (friendly names) and registry-updated events. Entities
+    without an area of their own inherit their device's area, as in Home
+    Assistant. The name indexes are rebuilt into new dicts and swapped in, so
+    lookups never take a lock; version increases on every rebuild.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.entities = {}  # entity_id -> entity registry entry
+        self.device_areas = {}  # device_id -> area_id
+        self.areas = {}  # area_id -> area registry entry
+        self.friendly_names = {}  # entity_id -> friendly_name attribute
+        self.entity_names = {}  # normalized spoken name -> entity_id
+        self.area_names = {}  # normalized spoken name -> area_id
+        self.version = 0
+        self.loaded = threading.Event()
+        self._lock = threading.Lock()
+        self._updates = queue.Queue()
+        self._thread = threading.Thread(target=self._update_worker, name="hass-registry", daemon=True)
+
+    def start(self):
+        self.client.subscribe('state_changed', self._on_state_changed)
+        for event_type in ('entity_registry_updated', 'device_registry_updated', 'area_registry_updated'):
+            self.client.subscribe(event_type, self._updates.put)
+        self.client.add_connect_listener(lambda: self._updates.put(None))  # None requests a full reload
+        self._thread.start()
+        return self
+
+    def _update_worker(self):
+        # Registry events need follow-up requests, which must not run on the receiver thread
+        while True:
+            event = self._updates.get()
+            try:
+                if event is None:
+                    self.reload()
+                else:
+                    self._apply_registry_event(event)
+            except Exception as e:
+                logger.warning(f"Could not update the Home Assistant registry cache: {e}")
+
+    def _request(self, message_type, **fields):
+        return self.client.request(dict(fields, type=message_type))
+
+    def _entity_entries(self, entity_ids):
+        """Fetch full registry entries (including aliases) for controllable, enabled entities"""
+        entity_ids = [entity_id for entity_id in entity_ids if entity_id.split('.')[0] in CONTROLLABLE_DOMAINS]
+        if not entity_ids:
+            return {}
+        entries = self._request('config/entity_registry/get_entries', entity_ids=entity_ids)
+        return {
+            entity_id: entry for entity_id, entry in entries.items()
+            if entry is not None and not entry.get('disabled_by')
+        }
+
+    def reload(self):
+        start = time.perf_counter()
+        areas = self._request('config/area_registry/list')
+        devices = self._request('config/device_registry/list')
+        listed = self._request('config/entity_registry/list')
+        states = self._request('get_states')
+        entities = self._entity_entries([entry['entity_id'] for entry in listed])
+        with self._lock:
+            self.areas = {area['area_id']: area for area in areas}
+            self.device_areas = {device['id']: device.get('area_id') for device in devices}
+            self.entities = entities
+            self.friendly_names = {
+                state['entity_id']: state['attributes'].get('friendly_name')
+                for state in states if state['entity_id'] in entities
+            }
+            self._rebuild_index()
+        self.loaded.set()
+        logger.info(f"Loaded Home Assistant registry: {len(self.entities)} entities, {len(self.areas)} areas "
+                    f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _apply_registry_event(self, event):
+        data = event.get('data', {})
+        event_type = event.get('event_type')
+        if event_type == 'entity_registry_updated':
+            entity_id = data.get('entity_id')
+            entries = {} if data.get('action') == 'remove' else self._entity_entries([entity_id])
+            with self._lock:
+                self.entities.pop(data.get('old_entity_id'), None)
+                self.entities.pop(entity_id, None)
+                self.entities.update(entries)
+                self._rebuild_index()
+        elif event_type == 'device_registry_updated':
+            if data.get('action') == 'remove':
+                devices = {device_id: area for device_id, area in self.device_areas.items()
+                           if device_id != data.get('device_id')}
+            else:
+                devices = {device['id']: device.get('area_id')
+                           for device in self._request('config/device_registry/list')}
+            with self._lock:
+                self.device_areas = devices
+                self._rebuild_index()
+        elif event_type == 'area_registry_updated':
+            areas = self._request('config/area_registry/list')
+            with self._lock:
+                self.areas = {area['area_id']: area for area in areas}
+                self._rebuild_index()
+
+    def _on_state_changed(self, event):
+        data = event.get('data', {})
+        entity_id = data.get('entity_id')
+        if entity_id not in self.entities:
+            return
+        new_state = data.get('new_state') or {}
+        name = new_state.get('attributes', {}).get('friendly_name')
+        if name != self.friendly_names.get(entity_id):
+            with self._lock:
+                self.friendly_names[entity_id] = name
+                self._rebuild_index()
+
+    def _rebuild_index(self):
+        entity_names = {}
+        for entity_id in sorted(self.entities):
+            entry = self.entities[entity_id]
+            for name in [self.friendly_names.get(entity_id), entry.get('name')] + list(entry.get('aliases') or []):
+                if name:
+                    entity_names.setdefault(normalize_spoken_name(name), entity_id)
+        area_names = {}
+        for area_id in sorted(self.areas):
+            area = self.areas[area_id]
+            for name in [area.get('name')] + list(area.get('aliases') or []):
+                if name:
+                    area_names.setdefault(normalize_spoken_name(name), area_id)
+        entity_names.pop('', None)
+        area_names.pop('', None)
+        self.entity_names = entity_names
+        self.area_names = area_names
+        self.version += 1
+
+    def area_of(self, entity_id):
+        entry = self.entities.get(entity_id) or {}
+        return entry.get('area_id') or self.device_areas.get(entry.get('device_id'))
+
+    def spoken_area_names(self):
+        return list(self.area_names)
+
+_hass_registry = None
+
+def get_hass_registry():
+    """Return the registry cache once it has loaded, or None"""
+    registry = _hass_registry
+    return registry if registry is not None and registry.loaded.is_set() else None
+
+def warm_up_hass_connection():
+    """Open the Home Assistant connections up front so the first command skips DNS and handshakes"""
+    global _hass_registry
+    if not HASS_TOKEN:
+        return
+    client = get_hass_websocket()
+    if client is not None and not client.wait_connected(HASS_CONNECT_TIMEOUT + HASS_READ_TIMEOUT):
+        logger.warning("Home Assistant WebSocket not connected yet, commands use REST until it is")
+    if client is not None and HASS_REGISTRY and _hass_registry is None:
+        _hass_registry = HassRegistry(client).start()
+        if not _hass_registry.loaded.wait(HASS_READ_TIMEOUT):
+            logger.warning("Home Assistant registry not loaded yet, using the built-in room table")
+    try:
+        _hass_request('GET', '/api/')
+    except Exception as e:
+        logger.warning(f"Could not pre-connect to Home Assistant: {e}")
+
+def send_command_to_hass(domain, service, target):
+    """Send command to Home Assistant; target is {"entity_id": ...} or {"area_id": ...}"""
     if not HASS_TOKEN:
         logger.error("Error: HASS_TOKEN not set")
         return False
 
-    headers = {
-        "Authorization": f"Bearer {HASS_TOKEN}",
-        "Content-Type": "application/json",
-    }
-
-    url = f"{HASS_HOST}/api/services/{domain}/{service}"
-    data = {"entity_id": entity_id}
+    client = get_hass_websocket()
+    if client is not None and client.connected:
+        start = time.perf_counter()
+        try:
+            client.call_service(domain, service, target=target)
+            logger.info(f"Command sent: {domain}.{service} for {target} "
+                        f"(acknowledged in {(time.perf_counter() - start) * 1000:.0f} ms)")
+            return True
+        except ConnectionError as e:
+            logger.warning(f"{e}, falling back to REST")
+        except Exception as e:
+            logger.error(f"Error sending command to Home Assistant: {e}")
+            return False
 
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        logger.info(f"Command sent: {domain}.{service} for {entity_id}")
+        _hass_request('POST', f"/api/services/{domain}/{service}", json=target)
+        logger.info(f"Command sent: {domain}.{service} for {target}")
         return True
     except Exception as e:
         logger.error(f"Error sending command to Home Assistant: {e}")
         return False
 
-def is_speech(audio_data, threshold=NOISE_THRESHOLD):
+FrameFeatures = namedtuple('FrameFeatures', [
+    'rms', 'speech_energy', 'has_periodic_echo', 'has_feedback_spikes', 'has_feedback_freqs'
+])
+
+class FrameFeatureEngine:
+    """Computes all per-frame VAD features from a single real FFT.
+
+    The frame is zero-padded to twice its length before the rfft. The even bins
+    of that spectrum are exactly the frame's own n-point DFT (used for band
+    energy and dominant peaks), and the inverse transform of the power spectrum
+    is the linear autocorrelation (used for echo detection). Frequency bins and
+    the speech band are precomputed once per frame size.
+
+    analyze() is the per-chunk streaming path and stays 1-D; analyze_batch()
+    vectorizes the same steps over many frames for offline re-scoring. Both
+    sum along contiguous rows, so they produce the same features.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._tables = {}
+
+    def _tables_for(self, n):
+        """Return cached (speech_band, peak_freqs) for frame length n"""
+        tables = self._tables.get(n)
+        if tables is None:
+            freqs = np.fft.rfftfreq(n, 1/self.sample_rate)
+            # Bins of the speech range (100-4000 Hz), a contiguous slice
+            speech_bins = np.flatnonzero((freqs >= 100) & (freqs <= 4000))
+            speech_band = slice(speech_bins[0], speech_bins[-1] + 1)
+            # Bins considered for dominant peaks: 0 .. n//2 - 1
+            peak_freqs = freqs[:n//2]
+            tables = (speech_band, peak_freqs)
+            self._tables[n] = tables
+        return tables
+
+    def analyze(self, audio_data, threshold=NOISE_THRESHOLD, echo_threshold=ECHO_THRESHOLD):
+        """Return FrameFeatures for a 1-D frame"""
+        audio_data = np.asarray(audio_data, dtype=np.float64)
+        n = len(audio_data)
+        speech_band, peak_freqs = self._tables_for(n)
+
+        # Calculate RMS amplitude
+        rms = np.sqrt(np.sum(np.square(audio_data)) / n)
+
+        spectrum = np.fft.rfft(audio_data, 2 * n)
+        magnitudes = np.abs(spectrum[::2])  # n-point DFT, non-negative frequencies
+
+        # Signal energy in speech frequency range (100-4000 Hz); the negative
+        # frequencies mirror the positive ones, hence the factor of 2
+        speech_energy = 2 * np.sum(magnitudes[speech_band]) / n
+
+        # 1. Check for periodic patterns in the signal (positive-lag autocorrelation)
+        autocorr = np.fft.irfft(np.square(np.abs(spectrum)), 2 * n)[:n]
+        peaks = np.where(autocorr > echo_threshold * np.max(autocorr))[0]
+        peak_spacing = np.diff(peaks)
+        has_periodic_echo = len(peak_spacing) > 2 and np.std(peak_spacing) < 0.1 * np.mean(peak_spacing)
+
+        # 2. Check for sudden amplitude changes
+        amplitude_changes = np.diff(np.abs(audio_data))
+        has_feedback_spikes = np.any(np.abs(amplitude_changes) > threshold * 2)
+
+        # 3. Check frequency distribution
+        top_freqs = peak_freqs[np.argsort(magnitudes[:n//2])[-3:]]
+        has_feedback_freqs = np.any((top_freqs > 2000) & (top_freqs < 4000))
+
+        return FrameFeatures(
+            float(rms), float(speech_energy), bool(has_periodic_echo),
+            bool(has_feedback_spikes), bool(has_feedback_freqs)
+        )
+
+    def analyze_batch(self, frames, threshold=NOISE_THRESHOLD, echo_threshold=ECHO_THRESHOLD):
+        """Return FrameFeatures of per-frame arrays for an (n_frames, frame_len) matrix"""
+        frames = np.ascontiguousarray(frames, dtype=np.float64)
+        m, n = frames.shape
+        speech_band, peak_freqs = self._tables_for(n)
+
+        # Calculate RMS amplitude
+        rms = np.sqrt(np.sum(np.square(frames), axis=1) / n)
+
+        spectrum = np.fft.rfft(frames, 2 * n, axis=1)
+        magnitudes = np.abs(spectrum[:, ::2])  # n-point DFT, non-negative frequencies
+
+        # Signal energy in speech frequency range (100-4000 Hz); the negative
+        # frequencies mirror the positive ones, hence the factor of 2
+        speech_energy = 2 * np.sum(magnitudes[:, speech_band], axis=1) / n
+
+        # 1. Check for periodic patterns in the signal (positive-lag autocorrelation).
+        # Spacing between consecutive peaks is taken from the previous peak index,
+        # carried forward with a running maximum.
+        autocorr = np.fft.irfft(np.square(np.abs(spectrum)), 2 * n, axis=1)[:, :n]
+        is_peak = autocorr > echo_threshold * np.max(autocorr, axis=1, keepdims=True)
+        lags = np.arange(n)
+        last_peak = np.maximum.accumulate(np.where(is_peak, lags, -1), axis=1)
+        prev_peak = np.empty_like(last_peak)
+        prev_peak[:, 0] = -1
+        prev_peak[:, 1:] = last_peak[:, :-1]
+        has_spacing = is_peak & (prev_peak >= 0)
+        spacing = np.where(has_spacing, lags - prev_peak, 0).astype(np.float64)
+        spacing_count = np.sum(has_spacing, axis=1)
+        safe_count = np.maximum(spacing_count, 1)
+        spacing_mean = np.sum(spacing, axis=1) / safe_count
+        deviation = np.where(has_spacing, spacing - spacing_mean[:, None], 0.0)
+        spacing_std = np.sqrt(np.sum(np.square(deviation), axis=1) / safe_count)
+        has_periodic_echo = (spacing_count > 2) & (spacing_std < 0.1 * spacing_mean)
+
+        # 2. Check for sudden amplitude changes
+        amplitude_changes = np.diff(np.abs(frames), axis=1)
+        has_feedback_spikes = np.any(np.abs(amplitude_changes) > threshold * 2, axis=1)
+
+        # 3. Check frequency distribution
+        top_bins = np.argsort(magnitudes[:, :n//2], axis=1)[:, -3:]
+        top_freqs = peak_freqs[top_bins]
+        has_feedback_freqs = np.any((top_freqs > 2000) & (top_freqs < 4000), axis=1)
+
+        return FrameFeatures(rms, speech_energy, has_periodic_echo, has_feedback_spikes, has_feedback_freqs)
+
+_feature_engine = FrameFeatureEngine()
+
+def _speech_decision(features, threshold):
+    """Combine frame features into a speech decision (scalars or arrays)"""
+    return (
+        (features.rms > threshold) &
+        (features.speech_energy > threshold) &
+        ~np.asarray(features.has_periodic_echo) &
+        ~np.asarray(features.has_feedback_spikes) &
+        ~np.asarray(features.has_feedback_freqs)
+    )
+
+def is_speech(audio_data, threshold=NOISE_THRESHOLD, echo_threshold=ECHO_THRESHOLD):
     """Detect if audio segment contains speech based on amplitude and frequency content"""
-    # Calculate RMS amplitude
-    rms = np.sqrt(np.mean(np.square(audio_data)))
-    
-    # Calculate signal energy in speech frequency range (100-4000 Hz)
-    fft = np.fft.fft(audio_data)
-    freqs = np.fft.fftfreq(len(audio_data), 1/SAMPLE_RATE)
-    speech_mask = (np.abs(freqs) >= 100) & (np.abs(freqs) <= 4000)
-    speech_energy = np.sum(np.abs(fft[speech_mask])) / len(audio_data)
-    
-    # Enhanced echo detection
-    # 1. Check for periodic patterns in the signal
-    autocorr = np.correlate(audio_data, audio_data, mode='full')
-    autocorr = autocorr[len(autocorr)//2:]  # Use only positive lags
-    peaks = np.where(autocorr > ECHO_THRESHOLD * np.max(autocorr))[0]
-    peak_spacing = np.diff(peaks)
-    has_periodic_echo = len(peak_spacing) > 2 and np.std(peak_spacing) < 0.1 * np.mean(peak_spacing)
-    
-    # 2. Check for sudden amplitude changes
-    amplitude_envelope = np.abs(audio_data)
-    amplitude_changes = np.diff(amplitude_envelope)
-    has_feedback_spikes = np.any(np.abs(amplitude_changes) > threshold * 2)
-    
-    # 3. Check frequency distribution
-    freq_magnitudes = np.abs(fft)[:len(fft)//2]
-    peak_freqs = freqs[:len(fft)//2][np.argsort(freq_magnitudes)[-3:]]
-    has_feedback_freqs = np.any((peak_freqs > 2000) & (peak_freqs < 4000))
-    
-    # Combine all criteria
-    is_valid_speech = (
-        rms > threshold and
-        speech_energy > threshold and
-        not has_periodic_echo and
-        not has_feedback_spikes and
-        not has_feedback_freqs
+    features = _feature_engine.analyze(audio_data, threshold, echo_threshold)
+    return bool(_speech_decision(features, threshold))
+
+def is_speech_batch(frames, threshold=NOISE_THRESHOLD, echo_threshold=ECHO_THRESHOLD,
+                    block_size=4096):
+    """Vectorized is_speech over an (n_frames, frame_len) array.
+
+    Returns (decisions, features) where decisions is a boolean array and features
+    is a FrameFeatures of per-frame arrays. Frames are processed in blocks of
+    block_size rows to bound memory on long recordings.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim != 2:
+        raise ValueError(f"Expected (n_frames, frame_len) array, got shape {frames.shape}")
+
+    blocks = [
+        _feature_engine.analyze_batch(frames[i:i + block_size], threshold, echo_threshold)
+        for i in range(0, max(len(frames), 1), block_size)
+    ]
+    features = FrameFeatures(*(np.concatenate(values) for values in zip(*blocks)))
+    return _speech_decision(features, threshold), features
+
+def frame_signal(audio, frame_len=CHUNK_SIZE):
+    """Split a 1-D recording into non-overlapping frames as the audio callback sees them"""
+    audio = np.asarray(audio)
+    n_frames = len(audio) // frame_len
+    return audio[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+def save_audio_segment(audio, filename):
+    """Write a normalized float32 segment to a 16-bit mono WAV file"""
+    with wave.open(filename, 'wb') as wf:
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(2)  # 16-bit audio
+        wf.setframerate(SAMPLE_RATE)
+
+        # Convert float32 to int16
+        audio_data = (audio * 32767).astype(np.int16)
+        wf.writeframes(audio_data.tobytes())
+
+# German command mappings
+COMMANDS = {
+    "ausschalten": "turn_off",
+    "einschalten": "turn_on",
+    "anschalten": "turn_on",  # Matched by word now, so no longer caught by "an" as a substring
+    "an": "turn_on",
+    "aus": "turn_off"
+}
+
+ROOMS = {
+    "wohnzimmer": "living_room",
+    "küche": "kitchen",
+    "schlafzimmer": "bedroom",
+    "bad": "bathroom"
+}
+
+# A room or area name starts a compound word only if one of these ends it,
+# after an optional linking element: "küche|n|licht", "bad|e|zimmer"
+COMPOUND_TAILS = ("licht", "lichter", "lampe", "lampen", "leuchte", "leuchten", "beleuchtung", "zimmer")
+COMPOUND_LINKS = ("", "e", "n", "s", "en", "es")
+
+def command_vocabulary():
+    """Return the spoken (rooms, commands) phrases the decoder should favour"""
+    rooms = list(ROOMS)
+    registry = get_hass_registry()
+    if registry is not None:
+        rooms += [name for name in registry.spoken_area_names() if name not in ROOMS]
+    return rooms, list(COMMANDS)
+
+def asr_decode_options(partial=False):
+    """Return transcribe() keyword arguments for the configured decoding mode"""
+    options = {
+        "language": "de",  # Set German as preferred language
+        "beam_size": 1 if partial else ASR_BEAM_SIZE,
+        "temperature": 0,
+    }
+    if ASR_VOCAB_BIAS in ('prompt', 'hotwords'):
+        rooms, commands = command_vocabulary()
+        if ASR_VOCAB_BIAS == 'prompt':
+            # Whisper continues in the style of the prompt, so phrase it like a command list
+            options["initial_prompt"] = (
+                ", ".join(room.capitalize() for room in rooms) + ". Licht " + ", ".join(commands) + "."
+            )
+        else:
+            options["hotwords"] = " ".join(rooms + commands)
+        options["without_timestamps"] = True
+        if not partial:
+            options["beam_size"] = ASR_BIASED_BEAM_SIZE
+    elif ASR_VOCAB_BIAS != 'off':
+        logger.warning(f"Unknown ASR_VOCAB_BIAS '{ASR_VOCAB_BIAS}', decoding without bias")
+    return options
+
+def _is_compound_tail(rest):
+    """True if rest, after an optional linking element, ends in a COMPOUND_TAILS noun"""
+    return any(
+        rest.startswith(link) and rest[len(link):].endswith(COMPOUND_TAILS)
+        for link in COMPOUND_LINKS
     )
-    
-    return is_valid_speech
 
-def process_command(text):
-    """Process the transcribed command and execute appropriate action"""
+class PhraseMatcher:
+    """Aho-Corasick automaton over whole words for all room, entity and command phrases.
+
+    The alphabet is normalized words, so every match starts and ends on a word
+    boundary ("an" never matches inside "wohnzimmer"). One pass over the text
+    finds all matches; overlaps are resolved in favour of the longest phrase,
+    then the leftmost. Names of compound_kinds also match at the start of a
+    German compound word that ends in a COMPOUND_TAILS noun ("küchenlicht",
+    but not "badminton"), with only those meanings.
+    """
+
+    def __init__(self, phrases, compound_kinds=()):
+        """phrases maps a phrase to a list of (kind, value) meanings"""
+        self.phrases = {}
+        self.heads = {}  # Name written as one word -> (phrase, meanings of compound_kinds)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # Per node: (phrase, word count) for every phrase ending there
+        for phrase, meanings in phrases.items():
+            words = normalize_spoken_name(phrase).split()
+            if not words:
+                continue
+            key = " ".join(words)
+            self.phrases.setdefault(key, []).extend(meanings)
+            node = 0
+            for word in words:
+                child = self.goto[node].get(word)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][word] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = child
+            if (key, len(words)) not in self.output[node]:
+                self.output[node].append((key, len(words)))
+            compound = [meaning for meaning in meanings if meaning[0] in compound_kinds]
+            if compound:
+                head = self.heads.setdefault("".join(words), (key, []))
+                head[1].extend(compound)
+        self.min_head = min(map(len, self.heads), default=0)
+
+        # Breadth-first failure links; each node also reports the phrases of its failure node
+        pending = deque(self.goto[0].values())
+        while pending:
+            node = pending.popleft()
+            for word, child in self.goto[node].items():
+                pending.append(child)
+                fail = self.fail[node]
+                while fail and word not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(word, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Return the longest non-overlapping matches in text order as (phrase, meanings)"""
+        matches = []
+        node = 0
+        for end, word in enumerate(normalize_spoken_name(text).split(), 1):
+            while node and word not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(word, 0)
+            for phrase, length in self.output[node]:
+                matches.append((end - length, end, phrase, self.phrases[phrase]))
+            if word not in self.phrases:
+                # Longest name the compound word starts with
+                for size in range(len(word) - 1, self.min_head - 1, -1):
+                    head = self.heads.get(word[:size])
+                    if head is not None and _is_compound_tail(word[size:]):
+                        matches.append((end - 1, end, *head))
+                        break
+
+        taken = set()
+        selected = []
+        for start, end, phrase, meanings in sorted(matches, key=lambda match: (match[0] - match[1], match[0])):
+            if taken.isdisjoint(range(start, end)):
+                taken.update(range(start, end))
+                selected.append((start, phrase, meanings))
+        return [(phrase, meanings) for _, phrase, meanings in sorted(selected, key=lambda match: match[0])]
+
+def bounded_edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 as soon as it must exceed limit.
+
+    Only the diagonal band of width 2 * limit + 1 is computed.
+    """
+    over = limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return over
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, char in enumerate(a, 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        left = row_min = current[low - 1]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if left + 1 < value:
+                value = left + 1
+            current[j] = left = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+class FuzzyResolver:
+    """Resolves misspelt spoken names through a character-trigram inverted index.
+
+    Names and queries are compared without spaces, so "schlaf zimmer" finds
+    "schlafzimmer". An edit changes at most three trigrams, so a name within
+    distance k must share at least (query trigrams - 3k) of them, so it must
+    also contain one of the 3k + 1 rarest query trigrams. Candidates are drawn
+    from those short posting lists only, filtered on the shared-trigram bound,
+    and checked with a banded edit distance, most shared trigrams first, until
+    no remaining candidate can beat the closest name found. Posting lists
+    are split by name length, so names whose length is out of range are
+    never touched.
+    """
+
+    def __init__(self, phrases):
+        """phrases maps a name to a list of (kind, value) meanings"""
+        self.names = []
+        self.grams = []
+        self.meanings = []
+        self.index = {}  # trigram -> {name length: ids of names of that length containing it}
+        self.lengths = set()
+        self.exact = {}  # name -> ids, for matches without edits
+        self.max_words = 1
+        for phrase, meanings in phrases.items():
+            words = normalize_spoken_name(phrase).split()
+            if not words:
+                continue
+            name_id = len(self.names)
+            self.names.append("".join(words))
+            self.meanings.append(meanings)
+            self.exact.setdefault(self.names[name_id], []).append(name_id)
+            self.max_words = max(self.max_words, len(words) + 1)  # Allow a name split in two by the ASR
+            self.grams.append(self._trigrams(self.names[name_id]))
+            length = len(self.names[name_id])
+            self.lengths.add(length)
+            for gram in self.grams[name_id]:
+                self.index.setdefault(gram, {}).setdefault(length, []).append(name_id)
+
+    @staticmethod
+    def _trigrams(word):
+        padded = f"#{word}#"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def max_distance(query):
+        return min(FUZZY_MAX_DISTANCE, 1 if len(query) < 8 else 2)
+
+    def _meanings(self, name_id, kinds):
+        return [meaning for meaning in self.meanings[name_id] if kinds is None or meaning[0] in kinds]
+
+    def _exact(self, query, kinds):
+        for name_id in self.exact.get(query, ()):
+            meanings = self._meanings(name_id, kinds)
+            if meanings:
+                return query, meanings, 0
+        return None
+
+    def _candidates(self, query, limit):
+        """Return (distance bound, -shared trigrams, name id) for names possibly within limit, best first"""
+        lengths = range(len(query) - limit, len(query) + limit + 1)
+        if self.lengths.isdisjoint(lengths):
+            return []
+        grams = self._trigrams(query)
+        postings = []
+        for gram in grams:
+            by_length = self.index.get(gram, {})
+            lists = [by_length[length] for length in lengths if length in by_length]
+            postings.append((sum(map(len, lists)), lists))
+        postings.sort(key=lambda posting: posting[0])
+        needed = max(1, len(grams) - 3 * limit)
+        pool = set()
+        for _, lists in postings[:len(grams) - needed + 1]:
+            for name_ids in lists:
+                pool.update(name_ids)
+        # Lower bound on the distance to each candidate: every trigram either
+        # side lacks took part in one of at most three per edit, and every
+        # character of length difference is an edit
+        candidates = []
+        for name_id in pool:
+            name_grams = self.grams[name_id]
+            count = len(grams & name_grams)
+            if count >= needed:
+                missing = max(len(grams), len(name_grams)) - count
+                bound = max(-(-missing // 3), abs(len(self.names[name_id]) - len(query)))
+                if bound <= limit:
+                    candidates.append((bound, -count, name_id))
+        candidates.sort()
+        return candidates
+
+    def _closest(self, query, candidates, kinds, limit):
+        """Verify candidates with the banded edit distance; returns the closest within limit, or None"""
+        best = None
+        for bound, _, name_id in candidates:
+            if bound > limit:
+                break  # Sorted by bound: nothing further can beat the current best
+            meanings = self._meanings(name_id, kinds)
+            if not meanings:
+                continue
+            distance = bounded_edit_distance(query, self.names[name_id], limit)
+            if distance <= limit:
+                best = (self.names[name_id], meanings, distance)
+                if distance == 0:
+                    break
+                limit = distance - 1  # Only a strictly closer name can replace it
+        return best
+
+    def lookup(self, query, kinds=None, limit=None):
+        """Return (name, meanings, distance) for the closest name to query within limit, or None"""
+        query = query.replace(" ", "")
+        if len(query) < FUZZY_MIN_LENGTH:
+            return None
+        limit = self.max_distance(query) if limit is None else min(limit, self.max_distance(query))
+        if limit < 0:
+            return None
+        exact = self._exact(query, kinds)
+        if exact is not None or limit == 0:
+            return exact
+        return self._closest(query, self._candidates(query, limit), kinds, limit)
+
+    def resolve(self, words, kinds=None):
+        """Return the best (name, meanings, distance) over all runs of words, or None.
+
+        None entries in words break runs. Ties on distance go to the longer
+        run, then the leftmost. All runs are searched at distance 0, then 1,
+        then 2, so a close match in one run spares the wide search of the
+        others; each run's candidates are gathered once for all distances.
+        """
+        runs = []
+        for length in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - length + 1):
+                run = words[start:start + length]
+                if None not in run and len("".join(run)) >= FUZZY_MIN_LENGTH:
+                    runs.append("".join(run))
+        for query in runs:
+            exact = self._exact(query, kinds)
+            if exact is not None:
+                return exact
+        candidates = {}
+        for limit in range(1, min(FUZZY_MAX_DISTANCE, 2) + 1):
+            for query in runs:
+                max_distance = self.max_distance(query)
+                if max_distance < limit:
+                    continue  # Already searched as far as this run allows
+                if query not in candidates:
+                    candidates[query] = self._candidates(query, max_distance)
+                match = self._closest(query, candidates[query], kinds, limit)
+                if match is not None:
+                    return match
+        return None
+
+_vocabulary_key = None
+_phrase_matcher = None
+_fuzzy_resolver = None
+_vocabulary_lock = threading.Lock()
+
+def _vocabulary():
+    """Return (PhraseMatcher, FuzzyResolver), rebuilding both only when the tables or the registry change"""
+    global _vocabulary_key, _phrase_matcher, _fuzzy_resolver
+    registry = get_hass_registry()
+    key = (tuple(ROOMS.items()), tuple(COMMANDS.items()),
+           None if registry is None else (id(registry), registry.version))
+    with _vocabulary_lock:
+        if key != _vocabulary_key:
+            names = {}
+            for phrase, room in ROOMS.items():
+                names.setdefault(phrase, []).append(('room', room))
+            if registry is not None:
+                for phrase, entity_id in registry.entity_names.items():
+                    names.setdefault(phrase, []).append(('entity', entity_id))
+                for phrase, area_id in registry.area_names.items():
+                    names.setdefault(phrase, []).append(('area', area_id))
+            phrases = {phrase: [('command', service)] for phrase, service in COMMANDS.items()}
+            for phrase, meanings in names.items():
+                phrases.setdefault(phrase, []).extend(meanings)
+            _phrase_matcher = PhraseMatcher(phrases, compound_kinds=('room', 'area'))
+            _fuzzy_resolver = FuzzyResolver(names)
+            _vocabulary_key = key
+            logger.debug(f"Built phrase matcher over {len(phrases)} phrases, fuzzy index over {len(names)} names")
+        return _phrase_matcher, _fuzzy_resolver
+
+def get_phrase_matcher():
+    """Return the matcher for the current tables, rebuilding it when they or the registry change"""
+    return _vocabulary()[0]
+
+def get_fuzzy_resolver():
+    """Return the fuzzy name resolver for the current tables and registry"""
+    return _vocabulary()[1]
+
+def parse_command(text):
+    """Parse transcribed text into a (domain, service, target) call, or None.
+
+    target is {"entity_id": ...} or {"area_id": ...}, as accepted by call_service.
+    """
     text = text.lower().strip()
     
     # Skip if text is too short or contains numbers (likely noise)
     if len(text) < 5 or any(char.isdigit() for char in text):
         logger.debug("Text too short or contains numbers, skipping")
-        return
+        return None
     
     # Enhanced noise pattern detection
     noise_patterns = ["lei", "los", "und", "aber", "nicht mehr", "das das", "und und"]
     for pattern in noise_patterns:
         if text.count(pattern) > 1:  # More aggressive pattern filtering
             logger.debug(f"Detected noise pattern '{pattern}', skipping")
-            return
+            return None
     
     # More aggressive repetition detection
     words = text.split()
@@ -178,7 +1710,7 @@ def process_command(text):
         for i in range(len(words)-1):
             if words[i] == words[i+1]:
                 logger.debug(f"Detected immediate word repetition: '{words[i]}', skipping")
-                return
+                return None
         
         # Check for phrase repetitions
         phrases = [' '.join(words[i:i+2]) for i in range(len(words)-1)]
@@ -187,57 +1719,695 @@ def process_command(text):
             phrase_counts[phrase] = phrase_counts.get(phrase, 0) + 1
             if phrase_counts[phrase] > MAX_REPETITIONS:
                 logger.debug(f"Skipping due to excessive repetition: '{phrase}'")
-                return
-    
-    # German command mappings
-    commands = {
-        "ausschalten": "turn_off",
-        "einschalten": "turn_on",
-        "an": "turn_on",
-        "aus": "turn_off"
-    }
-    
-    rooms = {
-        "wohnzimmer": "living_room",
-        "küche": "kitchen",
-        "schlafzimmer": "bedroom",
-        "bad": "bathroom"
-    }
-    
-    # Detect room
-    detected_room = None
-    for german_room, english_room in rooms.items():
-        if german_room in text:
-            detected_room = english_room
-            break
-    
-    # Detect command
-    detected_command = None
-    for german_cmd, english_cmd in commands.items():
-        if german_cmd in text:
-            detected_command = english_cmd
-            break
+                return None
     
+    # Find rooms, entities and commands in one pass; the leftmost match of each kind wins
+    detected = {}
+    matched_words = set()
+    for phrase, meanings in get_phrase_matcher().find(text):
+        matched_words.update(phrase.split())
+        for kind, value in meanings:
+            detected.setdefault(kind, value)
+    detected_command = detected.get('command')
+
+    # A command without a known target is likely a misrecognized name: correct it from the unmatched words
+    registry = get_hass_registry()
+    target_kinds = ('entity', 'area') if registry is not None else ('room',)
+    if FUZZY_MATCHING and detected_command and not any(kind in detected for kind in target_kinds):
+        words = [None if word in matched_words else word for word in normalize_spoken_name(text).split()]
+        match = get_fuzzy_resolver().resolve(words, target_kinds)
+        if match is not None:
+            name, meanings, distance = match
+            logger.info(f"Fuzzy matched '{name}' (edit distance {distance}) in '{text}'")
+            for kind, value in meanings:
+                detected.setdefault(kind, value)
+    detected_room = detected.get('room')
+
+    # Resolve a named entity, or else the lights of a whole area, from the registry cache
+    if registry is not None and detected_command:
+        if 'entity' in detected:
+            entity_id = detected['entity']
+            return entity_id.split('.')[0], detected_command, {"entity_id": entity_id}
+        if 'area' in detected:
+            return "light", detected_command, {"area_id": detected['area']}
+        logger.debug(f"No known entity or area in text: '{text}'")
+        return None
+
     if detected_room and detected_command:
         # Construct entity ID (assuming light)
-        entity_id = f"light.{detected_room}"
-        
-        # Send command to Home Assistant
-        if send_command_to_hass("light", detected_command, entity_id):
-            logger.info(f"Executed: {detected_command} for {entity_id}")
+        return "light", detected_command, {"entity_id": f"light.{detected_room}"}
+
+    logger.debug(f"No command found in text: '{text}'")
+    return None
+
+def execute_command(call):
+    """Send a parsed (domain, service, target) call to Home Assistant; returns True on success"""
+    domain, service, target = call
+    if send_command_to_hass(domain, service, target):
+        logger.info(f"Executed: {service} for {target}")
+        return True
+    logger.error("Failed to execute command")
+    return False
+
+def process_command(text):
+    """Process the transcribed command and execute appropriate action; returns True if one was executed"""
+    call = parse_command(text)
+    return call is not None and execute_command(call)
+
+# Shared capture ring layout (little-endian), readable from any process or language:
+#   header: 8 x uint64 = magic, version, sample_rate, capacity, total_written,
+#           sequence (odd while a write is in progress), 2 reserved
+#   data:   2 * capacity float32 samples, each sample stored at pos and pos + capacity
+_RING_MAGIC = 0x42525541  # b'AURB'
+_RING_VERSION = 1
+_RING_HEADER_BYTES = 64
+_H_MAGIC, _H_VERSION, _H_RATE, _H_CAPACITY, _H_WRITTEN, _H_SEQUENCE = range(6)
+
+def _ring_size(capacity):
+    return _RING_HEADER_BYTES + 2 * capacity * 4
+
+def _open_ring_backing(backing, size, create):
+    """Open shared storage for a ring: a shared memory name, or a file path to mmap.
+
+    Returns (buffer, handle) where handle is a SharedMemory or (file, mmap).
+    """
+    if '/' in backing:
+        if create:
+            f = open(backing, 'w+b')
+            f.truncate(size)
+            mapped = mmap.mmap(f.fileno(), size)
         else:
-            logger.error("Failed to execute command")
+            f = open(backing, 'rb')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped, (f, mapped)
+
+    if create:
+        try:
+            shm = shared_memory.SharedMemory(name=backing, create=True, size=size)
+        except FileExistsError:
+            # Left over from a previous run that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=backing)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=backing, create=True, size=size)
     else:
-        logger.debug(f"No command found in text: '{text}'")
+        shm = shared_memory.SharedMemory(name=backing)
+    return shm.buf, shm
+
+def _close_ring_backing(handle, unlink):
+    if isinstance(handle, shared_memory.SharedMemory):
+        handle.close()
+        if unlink:
+            handle.unlink()
+    elif handle is not None:
+        f, mapped = handle
+        mapped.close()
+        f.close()
+
+class AudioRingBuffer:
+    """Fixed-size float32 ring buffer with a write cursor and zero-copy reads.
+
+    Samples are stored normalized to [-1, 1]. The storage is mirrored (every
+    sample is written at ``pos`` and ``pos + capacity``) so that the most recent
+    window of any length is always a contiguous slice and can be returned as a
+    view without reallocating.
+
+    With a backing (a shared memory name or a file path), the ring lives in
+    shared storage with a small header so other processes can attach a
+    SharedRingReader and slice windows without copies.
+    """
+
+    def __init__(self, capacity, sample_rate=SAMPLE_RATE, backing=None):
+        self.capacity = int(capacity)
+        self.sample_rate = sample_rate
+        self.backing = backing
+        self.lock = threading.Lock()
+
+        size = _ring_size(self.capacity)
+        if backing:
+            buf, self._handle = _open_ring_backing(backing, size, create=True)
+        else:
+            buf, self._handle = bytearray(size), None
+        self._header = np.ndarray((8,), dtype=np.uint64, buffer=buf)
+        self._data = np.ndarray((2 * self.capacity,), dtype=np.float32, buffer=buf,
+                                offset=_RING_HEADER_BYTES)
+        self._data[:] = 0
+        self._header[:] = 0
+        self._header[_H_MAGIC] = _RING_MAGIC
+        self._header[_H_VERSION] = _RING_VERSION
+        self._header[_H_RATE] = sample_rate
+        self._header[_H_CAPACITY] = self.capacity
+
+    @property
+    def shared(self):
+        return bool(self.backing)
+
+    @property
+    def total_written(self):
+        """Monotonic count of samples written"""
+        return int(self._header[_H_WRITTEN])
+
+    @property
+    def _pos(self):
+        return self.total_written % self.capacity
+
+    def _store(self, start, chunk):
+        """Copy chunk into both mirrors at start, converting int16 if needed"""
+        end = start + len(chunk)
+        for offset in (0, self.capacity):
+            dest = self._data[offset + start:offset + end]
+            if chunk.dtype == np.int16:
+                np.multiply(chunk, 1.0 / 32768, out=dest, casting='unsafe')
+            else:
+                np.copyto(dest, chunk, casting='unsafe')
+
+    def write(self, chunk):
+        """Append a 1-D chunk of samples; O(len(chunk)), no allocation"""
+        n = len(chunk)
+        if n == 0:
+            return
+        if n > self.capacity:
+            chunk = chunk[-self.capacity:]
+            skipped = n - self.capacity
+            n = self.capacity
+        else:
+            skipped = 0
+
+        with self.lock:
+            pos = (self.total_written + skipped) % self.capacity
+            self._header[_H_SEQUENCE] += 1  # Odd: write in progress
+            first = min(n, self.capacity - pos)
+            self._store(pos, chunk[:first])
+            if first < n:
+                self._store(0, chunk[first:])
+            self._header[_H_WRITTEN] += n + skipped
+            self._header[_H_SEQUENCE] += 1
+
+    def latest(self, seconds=None):
+        """Return a view of the most recent window (valid until overwritten)"""
+        n = self.capacity if seconds is None else int(seconds * self.sample_rate)
+        n = max(0, min(n, self.capacity))
+        end = self._pos + self.capacity
+        return self._data[end - n:end]
+
+    def snapshot(self, seconds=None):
+        """Return a consistent copy of the most recent window"""
+        with self.lock:
+            return self.latest(seconds).copy()
+
+    def read(self, start_sample, end_sample):
+        """Return a copy of absolute samples [start_sample, end_sample), clamped to what is still buffered"""
+        with self.lock:
+            total_written = self.total_written
+            oldest = max(0, total_written - self.capacity)
+            start = max(start_sample, oldest)
+            end = min(end_sample, total_written)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            tail = self.capacity + total_written % self.capacity
+            return self._data[tail - (total_written - start):tail - (total_written - end)].copy()
+
+    def close(self):
+        """Release shared storage (unlinking it, as the owner)"""
+        if self._handle is not None:
+            del self._header, self._data
+            _close_ring_backing(self._handle, unlink=True)
+            self._handle = None
+
+class SharedRingReader:
+    """Read-only view of an AudioRingBuffer owned by another process"""
+
+    def __init__(self, backing):
+        self.backing = backing
+        buf, self._handle = _open_ring_backing(backing, 0, create=False)
+        self._header = np.ndarray((8,), dtype=np.uint64, buffer=buf)
+        if int(self._header[_H_MAGIC]) != _RING_MAGIC or int(self._header[_H_VERSION]) != _RING_VERSION:
+            self.close()
+            raise ValueError(f"{backing} is not a version {_RING_VERSION} audio ring")
+        self.capacity = int(self._header[_H_CAPACITY])
+        self.sample_rate = int(self._header[_H_RATE])
+        self._data = np.ndarray((2 * self.capacity,), dtype=np.float32, buffer=buf,
+                                offset=_RING_HEADER_BYTES)
+        self._header.flags.writeable = False
+        self._data.flags.writeable = False
+
+    @property
+    def total_written(self):
+        return int(self._header[_H_WRITTEN])
+
+    def is_valid(self, start_sample):
+        """True while samples from start_sample on have not been overwritten"""
+        return start_sample >= self.total_written - self.capacity
+
+    def view(self, start_sample, end_sample):
+        """Zero-copy view of absolute samples [start_sample, end_sample); valid while is_valid(start_sample)"""
+        total_written = self.total_written
+        if end_sample > total_written or not self.is_valid(start_sample) or end_sample < start_sample:
+            raise ValueError(f"Samples {start_sample}-{end_sample} are not buffered "
+                             f"(written {total_written}, capacity {self.capacity})")
+        tail = self.capacity + total_written % self.capacity
+        return self._data[tail - (total_written - start_sample):tail - (total_written - end_sample)]
+
+    def read(self, start_sample, end_sample, retries=3):
+        """Copy of absolute samples [start_sample, end_sample), consistent with concurrent writes.
+
+        Seqlock read: the copy is only returned if no write started or finished
+        while it was taken (the sequence is even and unchanged); otherwise it is
+        retried, raising RuntimeError if every attempt overlapped a write.
+        """
+        for _ in range(retries):
+            sequence = int(self._header[_H_SEQUENCE])
+            if sequence % 2:
+                time.sleep(0)
+                continue
+            audio = self.view(start_sample, end_sample).copy()
+            if int(self._header[_H_SEQUENCE]) == sequence:
+                return audio
+        raise RuntimeError(f"Samples {start_sample}-{end_sample} were overwritten while reading")
+
+    def close(self):
+        self._header = self._data = None
+        _close_ring_backing(self._handle, unlink=False)
+        self._handle = None
+
+class AudioWindow:
+    """Reference to absolute samples [start_sample, end_sample) of a shared audio ring"""
+
+    __slots__ = ('backing', 'start_sample', 'end_sample')
+
+    def __init__(self, backing, start_sample, end_sample):
+        self.backing = backing
+        self.start_sample = start_sample
+        self.end_sample = end_sample
+
+    def __len__(self):
+        return self.end_sample - self.start_sample
+
+class Endpointer:
+    """Speech endpointing state machine with onset and hangover hysteresis.
+
+    Feed it one VAD decision per frame together with the frame's absolute sample
+    offset. A segment opens after ONSET_FRAMES consecutive speech frames and
+    closes after SILENCE_DURATION of continuous non-speech (or when it reaches
+    max_duration). Closed segments are returned as (start_sample, end_sample)
+    if they contain at least MIN_SPEECH_DURATION of speech and span at least
+    MIN_SEGMENT_DURATION. After a frame that closed a segment too short to
+    keep, discarded holds its (start_sample, end_sample) instead.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, onset_frames=ONSET_FRAMES,
+                 hangover=SILENCE_DURATION, min_speech=MIN_SPEECH_DURATION,
+                 min_segment=MIN_SEGMENT_DURATION, max_duration=BUFFER_DURATION - PRE_ROLL_DURATION):
+        self.onset_frames = onset_frames
+        self.hangover_samples = int(hangover * sample_rate)
+        self.min_speech_samples = int(min_speech * sample_rate)
+        self.min_segment_samples = int(min_segment * sample_rate)
+        self.max_samples = int(max_duration * sample_rate)
+        self.reset()
+
+    def reset(self):
+        """Return to the idle state, discarding any open segment"""
+        self.in_speech = False
+        self.onset_run = 0
+        self.onset_start = None
+        self.start_sample = None
+        self.end_sample = None  # End of the last speech frame
+        self.speech_samples = 0
+        self.discarded = None
+
+    def long_enough(self):
+        """True once the open segment would be kept if it closed now"""
+        return (
+            self.in_speech and
+            self.speech_samples >= self.min_speech_samples and
+            self.end_sample - self.start_sample >= self.min_segment_samples
+        )
+
+    def _close(self):
+        """Close the open segment, returning it if it is long enough"""
+        segment = (self.start_sample, self.end_sample)
+        long_enough = self.long_enough()
+        self.reset()
+        if long_enough:
+            return segment
+        logger.debug(f"Discarding short speech segment {segment}")
+        self.discarded = segment
+        return None
+
+    def update(self, speech, start_sample, n_samples):
+        """Advance by one frame; returns a closed (start_sample, end_sample) segment or None"""
+        frame_end = start_sample + n_samples
+        self.discarded = None
+
+        if not self.in_speech:
+            if not speech:
+                self.onset_run = 0
+                return None
+            if self.onset_run == 0:
+                self.onset_start = start_sample
+            self.onset_run += 1
+            if self.onset_run >= self.onset_frames:
+                self.in_speech = True
+                self.start_sample = self.onset_start
+                self.end_sample = frame_end
+                self.speech_samples = frame_end - self.onset_start
+            return None
+
+        if speech:
+            self.end_sample = frame_end
+            self.speech_samples += n_samples
+        elif frame_end - self.end_sample >= self.hangover_samples:
+            return self._close()
+
+        if frame_end - self.start_sample >= self.max_samples:
+            return self._close()
+        return None
+
+TranscriptionJob = namedtuple(
+    'TranscriptionJob', ['audio', 'continuation', 'final', 'utterance', 'partial'],
+    defaults=(None, False)
+)
+
+def _normalize_word(word):
+    return word.strip('.,!?;:"\'()').lower()
+
+class TranscriptStitcher:
+    """Stitches overlapping transcriptions of one utterance into new, unexecuted words.
+
+    Consecutive chunks of a long utterance are decoded with a small audio
+    overlap. Words at the start of a continuation that repeat the tail of what
+    was already emitted are dropped. Words not yet consumed by an executed
+    command stay pending, so a command split across chunks is still recognized
+    but never executed twice.
+    """
+
+    def __init__(self, history=20):
+        self.history = deque(maxlen=history)
+        self.pending = []
+
+    def _overlap(self, words):
+        """Return how many leading words repeat the emitted tail"""
+        tail = list(self.history)
+        # The first decoded word of a continuation may be a clipped fragment
+        for skip in (0, 1):
+            candidate = words[skip:]
+            for k in range(min(len(tail), len(candidate)), 0, -1):
+                if skip and k < 2:
+                    break
+                if tail[-k:] == candidate[:k]:
+                    return skip + k
+        return 0
+
+    def add(self, text, continuation):
+        """Add a chunk's transcript; returns the pending (unexecuted) text"""
+        words = [word for word in text.split() if _normalize_word(word)]
+        if not continuation:
+            self.reset()
+        normalized = [_normalize_word(word) for word in words]
+        overlap = self._overlap(normalized) if continuation else 0
+        if overlap:
+            logger.debug(f"Dropping {overlap} overlapping words: {' '.join(words[:overlap])}")
+        self.history.extend(normalized[overlap:])
+        self.pending.extend(words[overlap:])
+        return " ".join(self.pending)
+
+    def consume(self):
+        """Mark pending words as used by an executed command"""
+        self.pending = []
+
+    def reset(self):
+        """Forget the current utterance"""
+        self.history.clear()
+        self.pending = []
+
+class LocalAgreement:
+    """Stable-prefix policy for streaming partial hypotheses.
+
+    A word is considered stable once two consecutive hypotheses for the same
+    utterance agree on it and on every word before it.
+    """
 
-class AudioProcessor:
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.utterance = None
+        self.previous = []
+
+    def update(self, utterance, text):
+        """Add a partial hypothesis; returns the currently stable prefix text"""
+        if utterance != self.utterance:
+            self.reset()
+            self.utterance = utterance
+        words = text.split()
+        normalized = [_normalize_word(word) for word in words]
+        agreed = 0
+        for previous, current in zip(self.previous, normalized):
+            if previous != current:
+                break
+            agreed += 1
+        self.previous = normalized
+        return " ".join(words[:agreed])
+
+class StageQueue:
+    """Bounded hand-off queue between pipeline stages with an explicit drop policy"""
+
+    POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+    def __init__(self, name, maxsize, policy='drop_oldest'):
+        if policy not in self.POLICIES:
+            logger.warning(f"Unknown drop policy '{policy}' for {name} queue, using drop_oldest")
+            policy = 'drop_oldest'
+        self.name = name
+        self.policy = policy
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+
+    def put(self, item):
+        """Enqueue item according to the drop policy; returns False if something was dropped"""
+        if self.policy == 'block':
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        self.dropped += 1
+        if self.policy == 'drop_newest':
+            return False
+
+        # drop_oldest: evict the head and retry once
+        try:
+            self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            pass
+        return False
+
+    def get(self, timeout=None):
+        """Dequeue the next item, raising queue.Empty on timeout"""
+        return self._queue.get(timeout=timeout)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+class WakeWordTrigger:
+    """Turns per-frame wake word scores into single trigger events.
+
+    Scores are smoothed per wake word over the last N frames (moving average or
+    peak-hold). After a trigger, further triggers are suppressed for the
+    refractory window and until the smoothed score has fallen back below the
+    threshold, so one utterance yields exactly one trigger.
+    """
+
+    def __init__(self, thresholds, frames=WAKE_WORD_SMOOTHING_FRAMES,
+                 mode=WAKE_WORD_SMOOTHING, refractory=WAKE_WORD_REFRACTORY,
+                 sample_rate=SAMPLE_RATE):
+        if mode not in ('mean', 'peak'):
+            logger.warning(f"Unknown wake word smoothing '{mode}', using mean")
+            mode = 'mean'
+        self.thresholds = dict(thresholds)
+        self.mode = mode
+        self.refractory_samples = int(refractory * sample_rate)
+        self.scores = {key: deque(maxlen=max(1, frames)) for key in self.thresholds}
+        self.last_trigger = None  # Sample offset of the last trigger
+        self.armed = True
+
+    def smoothed(self, wake_word):
+        """Return the current smoothed score for a wake word"""
+        scores = self.scores[wake_word]
+        if not scores:
+            return 0.0
+        return max(scores) if self.mode == 'peak' else sum(scores) / len(scores)
+
+    def update(self, prediction, offset):
+        """Add one frame of scores; returns (wake_word, score) on a trigger, else None"""
+        best = None
+        for wake_word, threshold in self.thresholds.items():
+            self.scores[wake_word].append(float(prediction.get(wake_word, 0.0)))
+            score = self.smoothed(wake_word)
+            if score > threshold and (best is None or score > best[1]):
+                best = (wake_word, score)
+
+        if best is None:
+            self.armed = True
+            return None
+        in_refractory = (
+            self.last_trigger is not None and
+            offset - self.last_trigger < self.refractory_samples
+        )
+        if not self.armed or in_refractory:
+            return None
+
+        self.armed = False
+        self.last_trigger = offset
+        return best
+
+class ASRExecutor:
+    """Bounded priority queue of transcription jobs for a pool of ASR workers.
+
+    Jobs of the same utterance are never handed to two workers at once, so
+    continuation chunks are transcribed in order. Jobs shed from a full queue
+    or expired past the deadline are passed to on_drop, outside the lock.
+    """
+
+    def __init__(self, maxsize=ASR_QUEUE_DEPTH, deadline=ASR_JOB_DEADLINE, on_drop=None):
+        self.maxsize = max(1, maxsize)
+        self.deadline = deadline
+        self.on_drop = on_drop
+        self._heap = []  # (priority, seq, enqueued_at, job)
+        self._seq = itertools.count()
+        self._busy = set()  # Utterances currently being transcribed
+        self._cond = threading.Condition()
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0  # Shed because the queue was full
+        self.expired = 0  # Dropped past the deadline
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _dropped(self, jobs):
+        if self.on_drop is None:
+            return
+        for job in jobs:
+            try:
+                self.on_drop(job)
+            except Exception as e:
+                logger.error(f"Error handling dropped ASR job: {e}")
+
+    def put(self, job, priority):
+        """Enqueue job; returns False if a job (this or a lower-priority one) was shed"""
+        shed = None
+        with self._cond:
+            self.submitted += 1
+            if len(self._heap) >= self.maxsize:
+                # Shed the new job if it is the least urgent, otherwise the
+                # oldest job of the least urgent priority
+                self.dropped += 1
+                worst_priority = max(entry[0] for entry in self._heap)
+                if priority > worst_priority:
+                    shed = job
+                else:
+                    victim = min(entry for entry in self._heap if entry[0] == worst_priority)
+                    self._heap.remove(victim)
+                    heapq.heapify(self._heap)
+                    shed = victim[3]
+            if shed is not job:
+                heapq.heappush(self._heap, (priority, next(self._seq), time.monotonic(), job))
+                self._cond.notify()
+        if shed is not None:
+            self._dropped([shed])
+        return shed is None
+
+    def get(self, timeout=None):
+        """Return (job, wait_seconds) for the most urgent runnable job, or None on timeout"""
+        end = None if timeout is None else time.monotonic() + timeout
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    for entry in sorted(self._heap):
+                        _, _, enqueued_at, job = entry
+                        if now - enqueued_at > self.deadline:
+                            self._heap.remove(entry)
+                            self.expired += 1
+                            expired.append(job)
+                            logger.warning(f"Dropping stale ASR job ({now - enqueued_at:.1f}s old)")
+                            continue
+                        if job.utterance is not None and job.utterance in self._busy:
+                            continue
+                        self._heap.remove(entry)
+                        heapq.heapify(self._heap)
+                        if job.utterance is not None:
+                            self._busy.add(job.utterance)
+                        wait = now - enqueued_at
+                        self.total_wait += wait
+                        self.max_wait = max(self.max_wait, wait)
+                        return job, wait
+                    heapq.heapify(self._heap)
+                    remaining = None if end is None else end - now
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+        finally:
+            self._dropped(expired)
+
+    def task_done(self, job):
+        """Mark a job returned by get() as finished"""
+        with self._cond:
+            self.completed += 1
+            self._busy.discard(job.utterance)
+            self._cond.notify_all()
+
+    def qsize(self):
+        with self._cond:
+            return len(self._heap)
+
+    def stats(self):
+        """Return queue depth, wait times and drop counters"""
+        with self._cond:
+            started = self.submitted - self.dropped - self.expired - len(self._heap)
+            return {
+                'depth': len(self._heap),
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'expired': self.expired,
+                'avg_wait': self.total_wait / started if started > 0 else 0.0,
+                'max_wait': self.max_wait,
+            }
+
+class AudioProcessor:
+    def __init__(self, wake_word_model=None):
         logger.info("Initializing AudioProcessor...")
-        self.audio_buffer = queue.Queue()
+        # The audio callback never blocks on this queue
+        frame_policy = FRAME_DROP_POLICY if FRAME_DROP_POLICY != 'block' else 'drop_oldest'
+        self.audio_buffer = StageQueue('frame', FRAME_QUEUE_DEPTH, frame_policy)
+        self.asr_queue = ASRExecutor(on_drop=self._on_job_dropped)
+        self.save_queue = StageQueue('save', SAVE_QUEUE_DEPTH, 'drop_newest')
+        self.stop_event = threading.Event()
+        self.workers = []
         self.recording = False
-        self.buffer = np.zeros(SAMPLE_RATE * BUFFER_DURATION)
-        self.buffer_lock = threading.Lock()
-        self.last_transcription_time = 0
+        self.ring = AudioRingBuffer(int(SAMPLE_RATE * AUDIO_RING_DURATION), backing=AUDIO_RING or None)
+        self.endpointer = Endpointer()
+        self.capture = None  # Post-wake command capture state
+        self.decoded_until = None  # End of audio already queued for the open utterance
+        # Per-utterance transcript state, so ASR workers can run utterances concurrently
+        self.stitchers = {}
+        self.agreements = {}
+        self.utterance_id = 0
+        self.current_utterance = None  # Id of the utterance being captured
+        self.last_partial_end = None
+        self.executed_utterances = set()  # Utterances already acted on from a partial hypothesis
+        self.finished_utterances = deque(maxlen=32)  # Recently finalized, to ignore late partials
+        self.gapped_utterances = set()  # Utterances that lost a chunk; their next chunk starts afresh
         
         try:
             logger.info(f"Opening audio device: {AUDIO_DEVICE}")
@@ -254,17 +2424,12 @@ class AudioProcessor:
             logger.error(f"Failed to initialize audio stream: {e}")
             raise
 
-        self.speech_detected = False
-        self.silence_frames = 0
-        self.speech_frames = 0
-
-        # Initialize wake word detection only if enabled
+        # Initialize wake word detection only if enabled (unless preloaded by startup())
         if WAKE_WORD_ENABLED:
             try:
-                logger.info("Initializing wake word model...")
-                self.wake_word_model = Model(vad_threshold=0.5)
+                self.wake_word_model = wake_word_model or initialize_wake_word_model()
+                self.wake_word_trigger = WakeWordTrigger(WAKE_WORDS)
                 self.last_prediction = None
-                logger.info("Wake word model initialized successfully")
             except Exception as e:
                 logger.error(f"Failed to initialize wake word model: {e}")
                 raise
@@ -273,104 +2438,363 @@ class AudioProcessor:
             self.last_prediction = None
             logger.info("Wake word detection disabled")
 
-    def should_transcribe(self):
-        """Determine if we should transcribe based on mode and timing"""
-        current_time = datetime.now().timestamp()
-        if not WAKE_WORD_ENABLED:
-            # Check if enough time has passed since last transcription
-            time_since_last = current_time - self.last_transcription_time
-            if time_since_last >= CONTINUOUS_TRANSCRIPTION_INTERVAL:
-                # Only transcribe if we detect speech
-                frames_per_chunk = CHUNK_SIZE
-                min_speech_frames = int(MIN_SPEECH_DURATION * SAMPLE_RATE / frames_per_chunk)
-                
-                if self.speech_frames >= min_speech_frames:
-                    self.last_transcription_time = current_time
-                    self.speech_frames = 0  # Reset counter
-                    return True
-        return False
-
     def _audio_callback(self, indata, frames, time, status):
-        """Callback for audio input"""
+        """Callback for audio input: only buffers and hands off the frame"""
         if status:
             logger.warning(f"Audio callback status: {status}")
         
-        # Convert to mono if necessary
+        # Convert to mono if necessary (a column view avoids a copy for mono)
         if CHANNELS > 1:
             audio_data = np.mean(indata, axis=1)
         else:
-            audio_data = indata.flatten()
+            audio_data = indata[:, 0]
 
-        # Check for speech
-        if is_speech(audio_data):
-            self.speech_frames += 1
-            self.silence_frames = 0
+        # Update circular buffer, remembering where this frame starts
+        offset = self.ring.total_written
+        self.ring.write(audio_data)
+
+        # PortAudio reuses indata, so the queued frame must be a copy
+        if not self.audio_buffer.put((offset, np.array(audio_data, dtype=np.float32))):
+            if self.audio_buffer.dropped % 100 == 1:
+                logger.warning(f"Frame queue full, dropped {self.audio_buffer.dropped} frames so far")
+
+    def _analysis_worker(self):
+        """Stage thread: VAD and wake word scoring on queued frames"""
+        while not self.stop_event.is_set():
+            try:
+                item = self.audio_buffer.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            try:
+                self._analyze_frame(*item)
+            except Exception as e:
+                logger.error(f"Error analyzing audio frame: {e}")
+
+    def _asr_worker(self):
+        """Stage thread: transcription of queued audio segments"""
+        while not self.stop_event.is_set():
+            item = self.asr_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            job, wait = item
+            if wait > 1.0:
+                logger.debug(f"ASR job waited {wait:.2f}s in queue")
+            try:
+                self.process_audio(job.audio, job.continuation, job.final, job.utterance, job.partial)
+            finally:
+                self.asr_queue.task_done(job)
+
+    def _save_worker(self):
+        """Side-channel thread: persist transcribed segments without blocking ASR"""
+        while not self.stop_event.is_set():
+            try:
+                item = self.save_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            audio, filename = item
+            try:
+                save_audio_segment(audio, filename)
+                logger.info(f"Saved audio segment to {filename}")
+            except Exception as e:
+                logger.error(f"Failed to save audio segment {filename}: {e}")
+
+    def _submit_transcription(self, segment=None, continuation=False, final=True, partial=False):
+        """Copy a (start_sample, end_sample) segment, or the whole buffer, to the ASR stage.
+
+        Fresh segments get PRE_ROLL_DURATION of pre-roll; continuations of an
+        utterance already start inside decoded audio.
+        """
+        if segment is None:
+            audio = self.ring.snapshot(BUFFER_DURATION)
         else:
-            self.silence_frames += 1
-            frames_per_chunk = CHUNK_SIZE
-            silence_frames_threshold = int(SILENCE_DURATION * SAMPLE_RATE / frames_per_chunk)
-            
-            if self.silence_frames >= silence_frames_threshold:
-                self.speech_frames = 0
+            start, end = segment
+            pre_roll = 0 if continuation else int(PRE_ROLL_DURATION * SAMPLE_RATE)
+            if self.ring.shared and ASR_PROCESS:
+                # The ASR process slices the shared ring itself; no copy here
+                oldest = max(0, self.ring.total_written - self.ring.capacity)
+                audio = AudioWindow(self.ring.backing, max(start - pre_roll, oldest), end)
+            else:
+                audio = self.ring.read(start - pre_roll, end)
+            logger.debug(f"Speech segment {start}-{end} ({(end - start) / SAMPLE_RATE:.2f}s)")
+        job = TranscriptionJob(audio, continuation, final, self.current_utterance, partial)
+        self._queue_job(job)
 
-        # Update circular buffer
-        with self.buffer_lock:
-            self.buffer = np.roll(self.buffer, -len(audio_data))
-            self.buffer[-len(audio_data):] = audio_data
+    def _queue_job(self, job):
+        """Hand a job to the ASR executor at its priority"""
+        if job.partial:
+            priority = PRIORITY_PARTIAL
+        elif WAKE_WORD_ENABLED:
+            priority = PRIORITY_WAKE
+        else:
+            priority = PRIORITY_CONTINUOUS
+        if not self.asr_queue.put(job, priority):
+            logger.warning(f"ASR queue full, shed lowest-priority job "
+                           f"({self.asr_queue.dropped} shed so far)")
+
+    def _begin_utterance(self):
+        """Assign an id to a newly opened utterance"""
+        self.utterance_id += 1
+        self.current_utterance = self.utterance_id
+        self.last_partial_end = None
+
+    def _close_utterance(self):
+        """Queue an empty final job, releasing the open utterance's state after its queued jobs"""
+        self._queue_job(TranscriptionJob(np.zeros(0, dtype=np.float32), True, True, self.current_utterance))
+
+    def _maybe_submit_partial(self, endpointer, frame_end):
+        """Queue a partial decode of the open utterance if streaming and the ASR stage is idle.
+
+        Early execution follows the same gates as the final transcript: no
+        partial is decoded until the endpointer would keep the utterance.
+        """
+        if not STREAMING_ASR or not endpointer.long_enough():
+            return
+        start_sample = endpointer.start_sample
+        last = self.last_partial_end or start_sample
+        if frame_end - last < STREAMING_STEP * SAMPLE_RATE:
+            return
+        # Partials are best effort: never queue them behind real work
+        if self.asr_queue.qsize() > 0:
+            return
+        self.last_partial_end = frame_end
+        self._submit_transcription((start_sample, frame_end), final=False, partial=True)
+
+    def _start_capture(self, start_sample):
+        """Begin recording the command that follows a wake word"""
+        self._begin_utterance()
+        self.capture = {
+            'start': start_sample,
+            'endpointer': Endpointer(
+                min_speech=MIN_COMMAND_SPEECH,
+                min_segment=MIN_COMMAND_SPEECH,
+                max_duration=MAX_COMMAND_DURATION
+            ),
+        }
+
+    def _update_capture(self, speech, offset, n_samples):
+        """Advance the post-wake capture; submits the command span once it ends"""
+        endpointer = self.capture['endpointer']
+        segment = endpointer.update(speech, offset, n_samples)
+        elapsed = (offset + n_samples - self.capture['start']) / SAMPLE_RATE
+        if endpointer.discarded is not None and self.last_partial_end is not None:
+            # Speech too short to keep after partials ran: the next attempt is a new utterance
+            self._close_utterance()
+            self._begin_utterance()
+
+        if segment is not None:
+            self.capture = None
+            self._submit_transcription(segment)
+        elif endpointer.in_speech and elapsed >= MAX_COMMAND_DURATION:
+            self.capture = None
+            logger.debug("Command capture reached MAX_COMMAND_DURATION")
+            self._submit_transcription((endpointer.start_sample, offset + n_samples))
+        elif not endpointer.in_speech and elapsed >= COMMAND_START_TIMEOUT:
+            self.capture = None
+            logger.info("No command heard after wake word")
+            if self.last_partial_end is not None:
+                self._close_utterance()
+        elif endpointer.in_speech:
+            self._maybe_submit_partial(endpointer, offset + n_samples)
+
+    def _analyze_frame(self, offset, audio_data):
+        """Run VAD, endpointing and wake word detection on a single frame"""
+        # Check for speech
+        speech = is_speech(audio_data)
 
         if WAKE_WORD_ENABLED:
+            # Record forward from the wake word until the command ends
+            if self.capture is not None:
+                self._update_capture(speech, offset, len(audio_data))
+
             # Process for wake word detection
             self.last_prediction = self.wake_word_model.predict(audio_data)
             
-            # Check if wake word detected
-            for wake_word in WAKE_WORDS:
-                confidence = self.last_prediction[wake_word]
-                if confidence > DETECTION_THRESHOLD:
-                    logger.info(
-                        f"Wake word: {WAKE_WORD_ALIAS} (confidence: {confidence:.2f})"
-                    )
-                    self.process_audio()
-                    break
+            # Check if wake word detected (smoothed, at most once per refractory window)
+            trigger = self.wake_word_trigger.update(self.last_prediction, offset)
+            if trigger is not None:
+                wake_word, confidence = trigger
+                logger.info(
+                    f"Wake word: {WAKE_WORD_ALIAS} ({wake_word}, confidence: {confidence:.2f})"
+                )
+                if self.capture is None:
+                    self._start_capture(offset + len(audio_data))
         else:
             # Continuous transcription mode
-            if self.should_transcribe():
-                self.process_audio()
+            self._update_continuous(speech, offset, len(audio_data))
 
-    def process_audio(self):
-        """Process the current audio buffer (save and transcribe)"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"/audio/audio_segment_{timestamp}.wav"
-        
-        # Save the audio buffer to a WAV file
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(2)  # 16-bit audio
-            wf.setframerate(SAMPLE_RATE)
-            
-            # Convert float32 to int16
-            audio_data = (self.buffer * 32767).astype(np.int16)
-            wf.writeframes(audio_data.tobytes())
-        
-        logger.info(f"Saved audio segment to {filename}")
+    def _update_continuous(self, speech, offset, n_samples):
+        """Transcribe each utterance as it ends, in overlapping chunks while it runs long"""
+        segment = self.endpointer.update(speech, offset, n_samples)
+        overlap = int(CONTINUOUS_OVERLAP_DURATION * SAMPLE_RATE)
+
+        if segment is not None:
+            start, end = segment
+            if self.decoded_until is None:
+                self._submit_transcription(segment)
+            elif end > self.decoded_until:
+                self._submit_transcription((self.decoded_until - overlap, end), continuation=True)
+            else:
+                # Nothing new since the last chunk; just close the utterance
+                self._close_utterance()
+            self.decoded_until = None
+            self.current_utterance = None
+            return
+
+        if not self.endpointer.in_speech:
+            if self.endpointer.discarded is not None and (
+                    self.decoded_until is not None or self.last_partial_end is not None):
+                # Too little speech to keep, but chunks or partials were queued: release their state
+                self._close_utterance()
+            self.decoded_until = None
+            self.current_utterance = None
+            return
+        if self.current_utterance is None:
+            self._begin_utterance()
+
+        # Long utterance: queue only new audio (plus overlap) once enough has accumulated
+        frame_end = offset + n_samples
+        decoded_until = self.decoded_until or self.endpointer.start_sample
+        if frame_end - decoded_until >= CONTINUOUS_TRANSCRIPTION_INTERVAL * SAMPLE_RATE:
+            if self.decoded_until is None:
+                self._submit_transcription((decoded_until, frame_end), final=False)
+            else:
+                self._submit_transcription((decoded_until - overlap, frame_end),
+                                           continuation=True, final=False)
+            self.decoded_until = frame_end
+        elif self.decoded_until is None:
+            # Partials only cover utterances that have not been split into chunks
+            self._maybe_submit_partial(self.endpointer, frame_end)
+
+    def start_workers(self):
+        """Start the VAD/wake word and ASR stage threads"""
+        self.stop_event.clear()
+        self.workers = [
+            threading.Thread(target=self._analysis_worker, name="analysis", daemon=True),
+        ]
+        self.workers.extend(
+            threading.Thread(target=self._asr_worker, name=f"asr-{i}", daemon=True)
+            for i in range(max(1, ASR_WORKERS))
+        )
+        if SAVE_AUDIO_SEGMENTS:
+            self.workers.append(threading.Thread(target=self._save_worker, name="save", daemon=True))
+        for worker in self.workers:
+            worker.start()
+
+    def stop_workers(self):
+        """Signal the stage threads to stop and wait for them"""
+        self.stop_event.set()
+        for worker in self.workers:
+            worker.join(timeout=5)
+        self.workers = []
 
-        # Transcribe the audio with German language preference
+    def process_partial(self, audio, utterance):
+        """Decode a partial hypothesis and act early once its stable prefix is a command"""
+        if utterance in self.finished_utterances:
+            return  # Late partial for an utterance that already has its final transcript
         try:
-            segments, info = asr_model.transcribe(
-                filename,
-                language="de",  # Set German as preferred language
-                beam_size=5,
-                temperature=0
-            )
-            
-            # Get the full transcribed text
-            transcribed_text = " ".join(segment.text for segment in segments)
+            # Partials are re-decoded every step, so they run on the fast tier when the cascade has one
+            tier = 'fast' if ASR_CASCADE else 'main'
+            segments, _ = get_asr_model(tier).transcribe(audio, **asr_decode_options(partial=True))
+            text = " ".join(segment.text for segment in gate_segments(segments))
+        except Exception as e:
+            logger.error(f"Error during partial transcription: {e}")
+            return
+
+        agreement = self.agreements.setdefault(utterance, LocalAgreement())
+        stable = agreement.update(utterance, text)
+        logger.debug(f"Partial hypothesis: '{text}' (stable: '{stable}')")
+        if not stable or utterance in self.executed_utterances:
+            return
+        call = parse_command(stable)
+        if call is not None and execute_command(call):
+            logger.info(f"Executed early from stable prefix: '{stable}'")
+            if utterance not in self.finished_utterances:
+                self.executed_utterances.add(utterance)
+
+    def _end_utterance(self, utterance):
+        """Drop per-utterance transcript state after its final job"""
+        self.finished_utterances.append(utterance)
+        self.stitchers.pop(utterance, None)
+        self.agreements.pop(utterance, None)
+        self.executed_utterances.discard(utterance)
+        self.gapped_utterances.discard(utterance)
+
+    def _stitcher(self, utterance):
+        """Return the utterance's stitcher; a finished utterance gets a throwaway one"""
+        if utterance in self.finished_utterances:
+            return TranscriptStitcher()
+        return self.stitchers.setdefault(utterance, TranscriptStitcher())
+
+    def _on_job_dropped(self, job):
+        """Keep utterance state consistent when the ASR executor sheds or expires a job"""
+        if job.partial:
+            return  # Partials are best effort; the final transcript still follows
+        if job.final:
+            # Chunks still queued for this utterance are transcribed on their own
+            logger.warning(f"Final ASR job of utterance {job.utterance} dropped, closing it")
+            self._end_utterance(job.utterance)
+        else:
+            logger.warning(f"ASR chunk of utterance {job.utterance} dropped, its audio is lost")
+            self.gapped_utterances.add(job.utterance)
+
+    def process_audio(self, audio=None, continuation=False, final=True, utterance=None, partial=False):
+        """Transcribe an in-memory audio segment, defaulting to the current buffer.
+
+        continuation marks audio that overlaps the previous job of the same
+        utterance; final marks the last job of an utterance; partial jobs are
+        streaming hypotheses of an utterance that is still open.
+        """
+        if partial:
+            self.process_partial(audio, utterance)
+            return
+        if audio is None:
+            audio = self.ring.snapshot(BUFFER_DURATION)
+        if len(audio) == 0:
+            if final:
+                self._end_utterance(utterance)
+            return
+
+        # Persisting audio is an optional side channel and never touches the ASR path
+        if SAVE_AUDIO_SEGMENTS:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filename = os.path.join(AUDIO_SAVE_DIR, f"audio_segment_{timestamp}.wav")
+            samples = audio
+            if isinstance(audio, AudioWindow):
+                samples = self.ring.read(audio.start_sample, audio.end_sample)
+            if not self.save_queue.put((samples, filename)):
+                logger.warning(f"Save queue full, not persisting {filename}")
+
+        # Transcribe the audio with German language preference; faster-whisper
+        # accepts a float32 NumPy array at 16 kHz directly
+        try:
+            transcribed_text, segments, info = transcribe_audio(audio, asr_decode_options())
             logger.info(f"Transcribed text: {transcribed_text}")
-            
-            # Process the command
-            process_command(transcribed_text)
+            if not transcribed_text.strip():
+                logger.debug("No segments passed the confidence gates")
+
+            # Drop words already decoded from the overlap, then process what is new
+            stitcher = self._stitcher(utterance)
+            if utterance in self.gapped_utterances:
+                # Words before the lost chunk must not combine with words after it
+                self.gapped_utterances.discard(utterance)
+                stitcher.reset()
+            pending_text = stitcher.add(transcribed_text, continuation)
+            if utterance in self.executed_utterances and not continuation:
+                # The command in this audio already ran from a partial hypothesis
+                logger.debug("Command already executed from partial hypothesis, skipping")
+                stitcher.consume()
+            elif pending_text and process_command(pending_text):
+                stitcher.consume()
                 
         except Exception as e:
             logger.error(f"Error during transcription or processing: {e}")
+        finally:
+            if final:
+                self._end_utterance(utterance)
 
     def start(self):
         """Start audio processing"""
@@ -383,17 +2807,28 @@ class AudioProcessor:
             logger.debug(f"Chunk Size: {CHUNK_SIZE}")
             logger.debug(f"Buffer Duration: {BUFFER_DURATION}")
             logger.debug(f"Wake Word Enabled: {WAKE_WORD_ENABLED}")
+            logger.debug(f"Save Audio Segments: {SAVE_AUDIO_SEGMENTS} ({AUDIO_SAVE_DIR})")
+            logger.debug(f"Audio ring: {AUDIO_RING or 'private'} ({AUDIO_RING_DURATION}s)")
+            logger.debug(f"Streaming ASR: {STREAMING_ASR} (step {STREAMING_STEP}s)")
+            logger.debug(f"ASR decoding: {asr_decode_options()}")
             logger.debug(f"Speech Enabled: {SPEECH_ENABLED}")
             logger.debug(f"ASR Model: {os.environ.get('ASR_MODEL')}")
             
             if WAKE_WORD_ENABLED:
                 logger.info("Initializing wake word detection...")
                 logger.info(f"Loaded wake words: {', '.join(WAKE_WORDS)}")
+                logger.debug(f"Wake word smoothing: {WAKE_WORD_SMOOTHING} over {WAKE_WORD_SMOOTHING_FRAMES} frames, "
+                             f"refractory {WAKE_WORD_REFRACTORY}s")
             else:
                 logger.info("Starting continuous transcription mode...")
-                interval = CONTINUOUS_TRANSCRIPTION_INTERVAL
-                logger.info(f"Will transcribe every {interval} seconds")
+                logger.info(f"Will transcribe each utterance after {SILENCE_DURATION}s of silence, "
+                            f"or every {CONTINUOUS_TRANSCRIPTION_INTERVAL}s while it continues")
             
+            self.start_workers()
+            logger.debug(f"Frame queue: depth={FRAME_QUEUE_DEPTH}, policy={self.audio_buffer.policy}")
+            logger.debug(f"ASR executor: depth={ASR_QUEUE_DEPTH}, workers={ASR_WORKERS}, "
+                         f"deadline={ASR_JOB_DEADLINE}s")
+
             try:
                 logger.debug("Setting up audio input stream...")
                 with sd.InputStream(
@@ -406,8 +2841,16 @@ class AudioProcessor:
                     logger.info("Listening for audio input...")
                     logger.info("Press Ctrl+C to stop")
                     
+                    last_stats = time.monotonic()
                     while True:
                         sd.sleep(1000)  # Sleep for 1 second
+                        if time.monotonic() - last_stats >= ASR_STATS_INTERVAL:
+                            last_stats = time.monotonic()
+                            stats = self.asr_queue.stats()
+                            logger.debug("ASR executor: " + ", ".join(
+                                f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                                for key, value in stats.items()
+                            ))
                         
             except sd.PortAudioError as e:
                 logger.error(f"Error setting up audio stream: {e}")
@@ -422,12 +2865,129 @@ class AudioProcessor:
         except Exception as e:
             logger.error("Critical error in audio processing", exc_info=True)
             raise
+        finally:
+            self.stop_workers()
+            self.ring.close()
+
+def _timed(timings, phase, func, *args):
+    """Run func(*args), recording its duration in timings[phase]"""
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+def _load_and_warm_asr(timings, tier='main'):
+    suffix = '' if tier == 'main' else f'_{tier}'
+    model = _timed(timings, f'asr_load{suffix}', get_asr_model, tier)
+    _timed(timings, f'asr_warmup{suffix}', warm_up_asr_model, model)
+    return model
+
+def _load_and_warm_wake_word(timings):
+    model = _timed(timings, 'wake_word_load', initialize_wake_word_model)
+    _timed(timings, 'wake_word_warmup', warm_up_wake_word_model, model)
+    return model
+
+def startup():
+    """Load and warm up the models concurrently, then open audio; returns a ready AudioProcessor"""
+    timings = {}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup") as executor:
+        hass_future = executor.submit(_timed, timings, 'hass_connect', warm_up_hass_connection)
+        asr_futures = []
+        if SPEECH_ENABLED:
+            asr_futures.append(executor.submit(_load_and_warm_asr, timings))
+            if ASR_CASCADE:
+                asr_futures.append(executor.submit(_load_and_warm_asr, timings, 'fast'))
+        wake_future = executor.submit(_load_and_warm_wake_word, timings) if WAKE_WORD_ENABLED else None
+
+        # Propagate load failures from any model
+        for future in asr_futures:
+            future.result()
+        wake_word_model = wake_future.result() if wake_future is not None else None
+        hass_future.result()
+
+    processor = _timed(timings, 'audio_device', AudioProcessor, wake_word_model)
+    timings['total'] = time.perf_counter() - start
+
+    summary = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in timings.items())
+    logger.info(f"Ready ({summary})")
+    return processor
+
+def _calibration_audio(path=None, duration=8.0):
+    """Load calibration audio from a 16 kHz mono 16-bit WAV, or synthesize a voiced signal"""
+    if path:
+        with wave.open(path, 'rb') as wf:
+            frames = wf.readframes(wf.getnframes())
+        return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768
+    # Harmonic stack with a syllable-rate envelope, so the decoder does real work
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    return (0.2 * voiced * envelope).astype(np.float32)
+
+def calibrate_asr_settings(audio_path=None):
+    """Measure the real-time factor of candidate settings and save the fastest.
+
+    Thread counts are tried within one worker's share of the CPUs, since
+    num_workers transcriptions run side by side.
+    """
+    from faster_whisper import WhisperModel
+
+    model_path = os.environ.get('WHISPER_MODEL_PATH', '/models')
+    model_name = os.environ.get('WHISPER_MODEL_TYPE', 'base')
+    cpus = available_cpus()
+    num_workers = asr_num_workers()
+    share = max(1, cpus // num_workers)
+    audio = _calibration_audio(audio_path)
+    duration = len(audio) / SAMPLE_RATE
+    thread_counts = sorted({share, max(1, share - 1), max(1, share // 2), 1}, reverse=True)
+
+    results = []
+    for compute_type in CALIBRATION_COMPUTE_TYPES:
+        for cpu_threads in thread_counts:
+            try:
+                model = WhisperModel(model_name, device="cpu", compute_type=compute_type,
+                                     cpu_threads=cpu_threads, download_root=model_path)
+                warm_up_asr_model(model)
+                start = time.perf_counter()
+                segments, _ = model.transcribe(audio, **asr_decode_options())
+                for _ in segments:
+                    pass
+                rtf = (time.perf_counter() - start) / duration
+            except Exception as e:
+                logger.warning(f"Calibration: {compute_type} with {cpu_threads} threads failed: {e}")
+                continue
+            logger.info(f"Calibration: compute_type={compute_type}, cpu_threads={cpu_threads}: rtf {rtf:.3f}")
+            results.append({'compute_type': compute_type, 'cpu_threads': cpu_threads, 'rtf': rtf})
+
+    if not results:
+        raise RuntimeError("No calibration candidate could be run")
+    best = min(results, key=lambda result: result['rtf'])
+    calibration = dict(best, model=model_name, cpus=cpus, num_workers=num_workers, results=results)
+    with open(ASR_CALIBRATION_FILE, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    logger.info(f"Calibration: fastest is compute_type={best['compute_type']}, "
+                f"cpu_threads={best['cpu_threads']} (rtf {best['rtf']:.3f}), saved to {ASR_CALIBRATION_FILE}")
+    return calibration
 
 if __name__ == "__main__":
+    if '--calibrate' in sys.argv:
+        # Usage: wake_word_detector.py --calibrate [audio.wav]
+        args = sys.argv[sys.argv.index('--calibrate') + 1:]
+        calibrate_asr_settings(args[0] if args else None)
+        sys.exit(0)
+
     try:
-        logger.info("Initializing AudioProcessor...")
-        processor = AudioProcessor()
+        processor = startup()
         processor.start()
     except Exception as e:
         logger.error("Failed to start AudioProcessor", exc_info=True)
-        raise 
\ No newline at end of file
+        raise
+    finally:
+        shutdown_asr_model()
+        close_hass_websocket()
+        close_hass_session() 
\ No newline at end of file